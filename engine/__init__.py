@@ -9,26 +9,28 @@ incrementally while the GStreamer integration is brought online.
 
 from __future__ import annotations
 
+from dataclasses import dataclass
+
 __all__ = [
     "EngineConfig",
     "RuntimeState",
 ]
 
 
+@dataclass(frozen=True, slots=True)
 class EngineConfig:
     """Placeholder for top level engine configuration."""
 
-    def __init__(self, profile: str = "default") -> None:
-        self.profile = profile
+    profile: str = "default"
 
 
+@dataclass(slots=True)
 class RuntimeState:
     """
     Shared in-memory state representation used by the control API and
     orchestration layer.
     """
 
-    def __init__(self) -> None:
-        self.running = False
-        self.current_scene: str | None = None
+    running: bool = False
+    current_scene: str | None = None
 
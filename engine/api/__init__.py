@@ -1,10 +1,20 @@
 """
 Control API package.
+
+``create_app`` is resolved lazily so that importing :mod:`engine.api.state`
+(or running the CLI's ``--help``) does not pull in FastAPI and Pydantic.
 """
 
 from __future__ import annotations
 
-from .server import create_app
+from typing import Any
 
 __all__ = ["create_app"]
 
+
+def __getattr__(name: str) -> Any:
+    if name == "create_app":
+        from .server import create_app
+
+        return create_app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -4,36 +4,96 @@ Pydantic schemas mirroring the REST/WS contract.
 
 from __future__ import annotations
 
-from typing import Dict, List, Optional
-
-from pydantic import AliasChoices, BaseModel, ConfigDict, Field, validator
+import sys
+from typing import Annotated, Dict, List, Literal, Optional, get_args
+
+from pydantic import (
+    AfterValidator,
+    AliasChoices,
+    BaseModel,
+    ConfigDict,
+    Field,
+    StringConstraints,
+    TypeAdapter,
+)
+
+__all__ = [
+    "ASSET_COLLECTION_ADAPTER",
+    "AssetCollection",
+    "AssetModel",
+    "ControlSettingsModel",
+    "DeckModel",
+    "EXPECTED_REV_KEYS",
+    "MixStateModel",
+    "NDIInputRequest",
+    "NDIOutputRequest",
+    "POSITION_US_KEYS",
+    "PrerenderRequest",
+    "RATE_KEYS",
+    "TRANSPORT_ADAPTER",
+    "TransportCommandRequest",
+    "TransportOp",
+    "ViewerStatusModel",
+]
+
+
+# Accepted spellings for transport command fields, shared with the realtime
+# handler so REST and WS resolve the same keys from the same string objects.
+EXPECTED_REV_KEYS = tuple(map(sys.intern, ("expected_rev", "expectedRev", "rev")))
+POSITION_US_KEYS = tuple(map(sys.intern, ("position_us", "positionUs", "pos_us", "posUs")))
+RATE_KEYS = tuple(map(sys.intern, ("rate", "value", "playRate", "speed")))
+
+
+def _clamp01(value: float) -> float:
+    return 0.0 if value < 0.0 else value if value <= 1.0 else 1.0
+
+
+def _clamp_non_negative(value: float) -> float:
+    return 0.0 if value < 0.0 else value
+
+
+_UnitFloat = Annotated[float, AfterValidator(_clamp01)]
+_NonNegativeFloat = Annotated[float, AfterValidator(_clamp_non_negative)]
+
+# Operations understood by ``TimelineTransport.apply``.
+TransportOp = Literal["play", "pause", "seek", "set_rate", "rate", "speed"]
+
+# Strip, case-fold and match ``op`` entirely inside pydantic-core.  The pattern
+# is checked before lowercasing, hence the case-insensitive group.
+_TransportOpStr = Annotated[
+    str,
+    StringConstraints(
+        strip_whitespace=True,
+        to_lower=True,
+        pattern=rf"^(?i:{'|'.join(get_args(TransportOp))})$",
+    ),
+]
 
 
 class DeckModel(BaseModel):
     type: Optional[str] = None
     asset_id: Optional[str] = Field(default=None, alias="assetId")
-    opacity: float = 0.0
+    opacity: _UnitFloat = 0.0
     enabled: bool = False
     model_config = ConfigDict(populate_by_name=True, validate_by_name=True)
 
-    @validator("opacity", pre=True)
-    def _clamp_opacity(cls, value: float) -> float:
-        return max(0.0, min(1.0, float(value)))
-
 
 class MixStateModel(BaseModel):
-    crossfaderAB: float = 0.5
-    crossfaderAC: float = 0.5
-    crossfaderBD: float = 0.5
-    crossfaderCD: float = 0.5
+    crossfaderAB: _UnitFloat = 0.5
+    crossfaderAC: _UnitFloat = 0.5
+    crossfaderBD: _UnitFloat = 0.5
+    crossfaderCD: _UnitFloat = 0.5
     decks: Dict[str, DeckModel] = Field(default_factory=dict)
 
-    @validator("crossfaderAB", "crossfaderAC", "crossfaderBD", "crossfaderCD", pre=True)
-    def _clamp(cls, value: float) -> float:
-        return max(0.0, min(1.0, float(value)))
-
 
 class AssetModel(BaseModel):
+    """
+    Asset listing entry.
+
+    Optional fields are omitted from encoded listings when unset, matching the
+    shape of the realtime ``init`` payload.
+    """
+
     id: str
     name: str
     url: Optional[str] = None
@@ -57,43 +117,26 @@ class ViewerStatusModel(BaseModel):
     isRunning: bool = False
     isGenerating: bool = False
     error: str = ""
-    audioSensitivity: float = 1.0
-
-    @validator("audioSensitivity", pre=True)
-    def _clamp_audio_sensitivity(cls, value: float) -> float:
-        return max(0.0, float(value))
+    audioSensitivity: _NonNegativeFloat = 1.0
 
 
 class TransportCommandRequest(BaseModel):
-    op: str
+    op: _TransportOpStr
     expected_rev: int = Field(
-        validation_alias=AliasChoices("expected_rev", "expectedRev", "rev"),
+        ge=0,
+        validation_alias=AliasChoices(*EXPECTED_REV_KEYS),
         serialization_alias="expected_rev",
     )
     position_us: Optional[int] = Field(
         default=None,
-        validation_alias=AliasChoices("position_us", "positionUs", "pos_us", "posUs", "position"),
+        validation_alias=AliasChoices(*POSITION_US_KEYS, "position"),
     )
     rate: Optional[float] = Field(
         default=None,
-        validation_alias=AliasChoices("rate", "value", "playRate", "speed"),
+        validation_alias=AliasChoices(*RATE_KEYS),
     )
 
-    model_config = ConfigDict(populate_by_name=True, validate_assignment=True)
-
-    @validator("op", pre=True)
-    def _normalise_op(cls, value: object) -> str:
-        result = str(value or "").strip()
-        if not result:
-            raise ValueError("op is required")
-        return result
-
-    @validator("expected_rev")
-    def _validate_expected_rev(cls, value: int) -> int:
-        coerced = int(value)
-        if coerced < 0:
-            raise ValueError("expected_rev must be non-negative")
-        return coerced
+    model_config = ConfigDict(populate_by_name=True, frozen=True)
 
     @property
     def rev(self) -> int:
@@ -112,3 +155,8 @@ class NDIInputRequest(BaseModel):
 
 class NDIOutputRequest(BaseModel):
     publishName: str
+
+
+# Validators are compiled once at import so route handlers never rebuild them.
+ASSET_COLLECTION_ADAPTER = TypeAdapter(AssetCollection)
+TRANSPORT_ADAPTER = TypeAdapter(TransportCommandRequest)
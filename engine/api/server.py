@@ -6,17 +6,27 @@ from __future__ import annotations
 
 import asyncio
 import contextlib
+import hashlib
+import heapq
+import itertools
 import logging
+import mimetypes
 import os
 import re
+import stat
 import time
 import uuid
-from collections import defaultdict
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from email.utils import parsedate
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Callable, Dict, Optional, Set
+from typing import Any, AsyncContextManager, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple, TypeVar
 
+import anyio.to_thread
 import httpx
+import orjson
 
 from fastapi import (
     FastAPI,
@@ -27,25 +37,237 @@ from fastapi import (
     WebSocket,
     WebSocketDisconnect,
 )
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from pydantic import TypeAdapter, ValidationError
 from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 import yaml
 
 from .. import EngineConfig
 from ..pipeline import OutputConfig, OutputType, SourceType, VideoSourceConfig
 from ..timeline import InvalidCommand, RevisionMismatch
-from ..utils.assets import MP4_DIR, ROOT_DIR, read_fallback_assets
+from ..utils.assets import MP4_DIR, ROOT_DIR, fallback_assets_signature, read_fallback_assets
 from . import schemas
 from .state import DeckLoadError, DeckManager, EngineState
 
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:  # pragma: no cover - PyYAML built without libyaml
+    from yaml import SafeLoader as _YamlLoader  # type: ignore[assignment]
+
 CONFIG_DIR = Path(__file__).resolve().parent.parent / "configs"
 PROFILES_PATH = CONFIG_DIR / "profiles.yaml"
+PROXY_HEADERS = {"User-Agent": "MuLoomProxy/1.0"}
+THREAD_POOL_ENV_VAR = "MULOOM_THREAD_POOL"
+DEFAULT_THREAD_POOL_SIZE = 64
 
 
 LOG = logging.getLogger(__name__)
 
+_T = TypeVar("_T")
+
+# Matches a ``..`` path segment with either separator style.
+_PARENT_SEGMENT = re.compile(r"(?:^|[\\/])\.\.(?:[\\/]|$)")
+
+# Read size for streamed MP4 ranges: small enough to respect the server's
+# write back-pressure, large enough to keep threadpool hops infrequent.
+MP4_CHUNK_SIZE = 128 * 1024
+
+# Upper bound (in characters) for a coalesced array frame sent to clients
+# that negotiated the "batch" feature.
+WS_MAX_BATCH_SIZE = 32 * 1024
+
+# Keepalive frames only differ by timestamp, so they are formatted from a
+# template instead of going through the JSON encoder.
+_PING_FRAME = '{"type":"ping","ts":%r}'
+_PONG_FRAME = '{"type":"pong","ts":%r}'
+
+# Session-level frame types handled by the receive loop itself.
+_CONTROL_FRAME_TYPES = frozenset({"ping", "pong", "ack"})
+
+# Legacy top-level hello flags that opt a client into acknowledgements.
+_HELLO_ACK_KEYS = ("supportsAck", "requireAck", "acks", "ack")
+
+# Transport position keys in lookup order, paired with the factor that converts
+# their unit to microseconds.
+_POSITION_KEY_SCALES = tuple((key, 1) for key in schemas.POSITION_US_KEYS) + tuple(
+    (key, 1_000_000) for key in ("position_s", "positionSeconds", "position", "seconds")
+)
+
+MessageHandler = Callable[["RealtimeSession", Dict[str, Any]], Awaitable[None]]
+
+
+def _encode_frame(payload: Any) -> str:
+    """Serialise a realtime payload into a WebSocket text frame."""
+
+    return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+def _transport_error(command_id: str, code: str, message: str, **extra: Any) -> Dict[str, Any]:
+    return {
+        "type": "transport-error",
+        "commandId": command_id,
+        "payload": {"code": code, "message": message, **extra},
+    }
+
+
+# Fixed transport-command validation errors. Their payloads never change, so
+# the encoded tail of each frame is built once and only the commandId is
+# spliced in per reply.
+_TRANSPORT_ERROR_PAYLOADS: Dict[str, Dict[str, str]] = {
+    key: {"code": "E_INVALID_PAYLOAD", "message": message}
+    for key, message in (
+        ("missing_op", "transport-command requires payload.op"),
+        ("missing_rev", "transport-command requires payload.expected_rev"),
+        ("rev_not_int", "payload.expected_rev must be an integer"),
+        ("negative_rev", "payload.expected_rev must be non-negative"),
+    )
+}
+_TRANSPORT_ERROR_SUFFIXES: Dict[str, str] = {
+    key: f',"payload":{_encode_frame(payload)}}}' for key, payload in _TRANSPORT_ERROR_PAYLOADS.items()
+}
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson.
+
+    Used for endpoints that return raw engine dictionaries; routes with a
+    response model keep FastAPI's Pydantic serialisation.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+async def _validate_body(request: Request, adapter: TypeAdapter[_T]) -> _T:
+    """Parse and validate a JSON request body in a single pydantic-core pass."""
+
+    body = await request.body()
+    try:
+        return adapter.validate_json(body)
+    except ValidationError as exc:
+        errors = [
+            {**error, "loc": ("body", *error["loc"])}
+            for error in exc.errors(include_url=False)
+        ]
+        raise RequestValidationError(errors, body=body) from None
+
+
+def _json_request_body(model: type) -> Dict[str, Any]:
+    """OpenAPI ``requestBody`` for routes that validate the raw body themselves."""
+
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": model.model_json_schema()}},
+        }
+    }
+
+
+@lru_cache(maxsize=1)
+def _encode_assets(signature: tuple) -> tuple[bytes, str]:
+    """Return the JSON body and ETag for the asset listing identified by ``signature``."""
+
+    collection = schemas.ASSET_COLLECTION_ADAPTER.validate_python(read_fallback_assets())
+    body = schemas.ASSET_COLLECTION_ADAPTER.dump_json(collection, exclude_none=True)
+    return body, f'"{hashlib.sha256(body).hexdigest()}"'
+
+
+@lru_cache(maxsize=4)
+def _load_profiles(path: Path, mtime_ns: int) -> Dict[str, Any]:
+    """Parse the profiles YAML; ``mtime_ns`` keys the cache so edits are picked up."""
+
+    return yaml.load(path.read_bytes(), Loader=_YamlLoader) or {}
+
+
+@lru_cache(maxsize=1024)
+def _proxy_target(url: str) -> httpx.URL:
+    """Vet and parse a ``/proxy/media`` target; repeated URLs skip re-parsing."""
+
+    # Reject other schemes before paying for a full parse.
+    if not url[:8].lower().startswith(("http://", "https://")):
+        raise ValueError("Unsupported scheme")
+    try:
+        return httpx.URL(url)
+    except Exception:
+        raise ValueError("Invalid url") from None
+
+
+def _thread_pool_size() -> int:
+    """Worker count from ``MULOOM_THREAD_POOL``, falling back on bad values."""
+
+    raw = os.environ.get(THREAD_POOL_ENV_VAR)
+    if raw is None:
+        return DEFAULT_THREAD_POOL_SIZE
+    try:
+        size = int(raw)
+    except ValueError:
+        size = 0
+    if size <= 0:
+        LOG.warning(
+            "Ignoring invalid %s=%r; using %d threads",
+            THREAD_POOL_ENV_VAR,
+            raw,
+            DEFAULT_THREAD_POOL_SIZE,
+        )
+        return DEFAULT_THREAD_POOL_SIZE
+    return size
+
+
+def _configure_thread_pools() -> None:
+    """Size anyio's thread limiter and the loop's default executor."""
+
+    # Starlette runs file reads, streamed iterators and sync routes on anyio's
+    # thread limiter (40 tokens by default); the loop's default executor only
+    # serves the init payload's asset scan. Size both from the same setting so
+    # MP4 streaming is not capped below it.
+    pool_size = _thread_pool_size()
+    anyio.to_thread.current_default_thread_limiter().total_tokens = pool_size
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="muloom")
+    )
+
+
+def _encoded_fallback_assets() -> orjson.Fragment:
+    """Pre-encoded asset listing for embedding into realtime payloads."""
+
+    return orjson.Fragment(_encode_assets(fallback_assets_signature())[0])
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def _not_modified(request: Request, etag: str, last_modified: str) -> bool:
+    """Conditional GET check matching ``StaticFiles.is_not_modified``."""
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = parsedate(request.headers.get("if-modified-since", ""))
+    modified = parsedate(last_modified)
+    return if_modified_since is not None and modified is not None and if_modified_since >= modified
+
+
+def _asset_listing_response(request: Request) -> Response:
+    body, etag = _encode_assets(fallback_assets_signature())
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _new_pipeline_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="muloom-pipeline")
+
 
 @dataclass
 class OutboundMessage:
@@ -55,12 +277,13 @@ class OutboundMessage:
     allow_drop: bool = False
     is_retry: bool = False
     retries: int = 0
+    encoded: Optional[str] = None
 
 
 @dataclass
 class PendingAck:
     message: OutboundMessage
-    deadline: float
+    deadline_ns: int
     retries: int = 0
 
 
@@ -75,12 +298,19 @@ class RealtimeSession:
         self.deck_id = "default"
         self.client_role = "unknown"
         self.client_info: Dict[str, Any] = {}
-        self.send_queue: asyncio.Queue[OutboundMessage] = asyncio.Queue(maxsize=queue_size)
+        self.queue_size = queue_size
+        self._send_buffer: deque[OutboundMessage] = deque()
+        self._send_waker: Optional[asyncio.Future[None]] = None
+        self._tasks: Tuple[asyncio.Task, ...] = ()
+        self._asgi_send: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None
         self.pending_acks: Dict[str, PendingAck] = {}
-        self.last_pong = time.monotonic()
+        self._ack_deadlines: List[Tuple[int, str]] = []
+        self.last_pong_ns = time.monotonic_ns()
         self._stop_event = asyncio.Event()
         self._closing = False
+        self._close_task: Optional[asyncio.Task] = None
         self.supports_ack = False
+        self.supports_batch = False
         self.legacy_client = False
         self.logger = LOG.getChild(f"ws.{self.session_id[:8]}")
 
@@ -88,18 +318,40 @@ class RealtimeSession:
     def is_stopped(self) -> bool:
         return self._stop_event.is_set()
 
+    def _mark_stopped(self) -> None:
+        if self._stop_event.is_set():
+            return
+        self._stop_event.set()
+        self._wake_sender()
+        # Whichever loop noticed the stop ends on its own; the others may be
+        # parked in receive() or a long sleep, so cancel them for the session
+        # to unwind promptly.
+        current = asyncio.current_task()
+        for task in self._tasks:
+            if task is not current:
+                task.cancel()
+
+    def _wake_sender(self) -> None:
+        waker = self._send_waker
+        if waker is not None and not waker.done():
+            waker.set_result(None)
+
     async def run(self) -> None:
         try:
             await self.websocket.accept()
         except Exception:  # pragma: no cover - defensive
             self.logger.exception("Failed to accept WebSocket connection")
             return
+        # Frames are pushed straight to the ASGI server once the handshake is
+        # done; the send loop stops before close(), which keeps Starlette's
+        # connection state consistent without re-checking it per frame.
+        self._asgi_send = getattr(self.websocket, "_send", None)
 
         initial_message: Optional[Dict[str, Any]] = None
         legacy_mode = False
         try:
             first_message = await asyncio.wait_for(
-                self.websocket.receive_json(), timeout=self.manager.hello_timeout
+                self._receive_json(), timeout=self.manager.hello_timeout
             )
         except asyncio.TimeoutError:
             legacy_mode = True
@@ -146,13 +398,34 @@ class RealtimeSession:
             except Exception:  # pragma: no cover - defensive: legacy path only
                 self.logger.exception("Failed to process initial legacy message")
 
+        prefix = f"ws-{self.session_id[:8]}"
+        loops = [
+            (self._recv_loop, "recv"),
+            (self._send_loop, "send"),
+            (self._keepalive_loop, "keepalive"),
+        ]
+        if self.supports_ack and self.manager.ack_timeout > 0:
+            loops.append((self._monitor_pending_acks, "acks"))
+        tasks = tuple(
+            asyncio.create_task(factory(), name=f"{prefix}-{label}") for factory, label in loops
+        )
+        self._tasks = tasks
+        failure: Optional[BaseException] = None
         try:
-            async with asyncio.TaskGroup() as task_group:
-                task_group.create_task(self._recv_loop())
-                task_group.create_task(self._send_loop())
-                task_group.create_task(self._keepalive_loop())
-                if self.supports_ack and self.manager.ack_timeout > 0:
-                    task_group.create_task(self._monitor_pending_acks())
+            # Plain tasks rather than a TaskGroup: the loops stop each other
+            # via _mark_stopped(), and a failure surfaces unwrapped instead of
+            # inside an ExceptionGroup.
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            failure = next(
+                (
+                    task.exception()
+                    for task in tasks
+                    if task in done and not task.cancelled() and task.exception() is not None
+                ),
+                None,
+            )
+            if failure is not None:
+                raise failure
         except asyncio.CancelledError:
             raise
         except WebSocketDisconnect:
@@ -160,6 +433,17 @@ class RealtimeSession:
         except Exception:  # pragma: no cover - defensive
             self.logger.exception("Realtime session crashed")
         finally:
+            self._mark_stopped()
+            await asyncio.wait(tasks)
+            # Retrieve every loop's outcome so later failures are logged here
+            # rather than as "Task exception was never retrieved".
+            for task in tasks:
+                if task.cancelled():
+                    continue
+                exc = task.exception()
+                if exc is None or exc is failure or isinstance(exc, WebSocketDisconnect):
+                    continue
+                self.logger.error("Realtime %s task failed", task.get_name(), exc_info=exc)
             await self.manager.finalise_session(self)
             await self.close(code=1000)
 
@@ -167,7 +451,7 @@ class RealtimeSession:
         if self._closing:
             return
         self._closing = True
-        self._stop_event.set()
+        self._mark_stopped()
         with contextlib.suppress(RuntimeError, WebSocketDisconnect):
             await self.websocket.close(code=code, reason=reason)
 
@@ -178,38 +462,76 @@ class RealtimeSession:
         require_ack: bool = False,
         command_id: Optional[str] = None,
         allow_drop: bool = False,
+        encoded: Optional[str] = None,
     ) -> None:
+        self.send_nowait(
+            payload,
+            require_ack=require_ack,
+            command_id=command_id,
+            allow_drop=allow_drop,
+            encoded=encoded,
+        )
+
+    def send_nowait(
+        self,
+        payload: Dict[str, Any],
+        *,
+        require_ack: bool = False,
+        command_id: Optional[str] = None,
+        allow_drop: bool = False,
+        encoded: Optional[str] = None,
+    ) -> bool:
+        """Queue ``payload`` for the send loop without suspending.
+
+        Returns ``False`` when the message was not queued.
+        """
+
         if self.is_stopped:
-            return
+            return False
 
-        prepared = dict(payload)
+        prepared = payload
         need_ack = require_ack and self.supports_ack
         ack_id = command_id
         if need_ack:
-            ack_id = ack_id or prepared.get("commandId")
+            ack_id = ack_id or payload.get("commandId")
             if not ack_id:
-                ack_id = uuid.uuid4().hex
-                prepared["commandId"] = ack_id
+                ack_id = self.manager.next_command_id()
+                prepared = {**payload, "commandId": ack_id}
+            encoded = None
 
         message = OutboundMessage(
             payload=prepared,
             require_ack=need_ack,
             command_id=ack_id,
             allow_drop=allow_drop,
+            encoded=encoded,
         )
 
-        if allow_drop:
-            try:
-                self.send_queue.put_nowait(message)
-                return
-            except asyncio.QueueFull:
-                self.logger.debug(
-                    "Dropping %s message due to backpressure",
-                    prepared.get("type"),
-                )
-                return
+        if allow_drop and len(self._send_buffer) >= self.queue_size:
+            self.logger.debug(
+                "Dropping %s message due to backpressure",
+                prepared.get("type"),
+            )
+            return False
 
-        await self.send_queue.put(message)
+        return self._enqueue(message)
+
+    def _enqueue(self, message: OutboundMessage) -> bool:
+        if len(self._send_buffer) >= self.manager.max_buffered_messages:
+            # Frames that cannot be dropped would otherwise pile up without
+            # bound behind a stalled client until the pong timeout fires.
+            if not self._closing:
+                self.logger.warning(
+                    "%d messages buffered for a stalled client; closing connection",
+                    len(self._send_buffer),
+                )
+                self._close_task = asyncio.create_task(
+                    self.close(code=1011, reason="send buffer overflow")
+                )
+            return False
+        self._send_buffer.append(message)
+        self._wake_sender()
+        return True
 
     def _acknowledge(self, message: Dict[str, Any]) -> bool:
         ack_id = message.get("commandId") or message.get("ack") or message.get("ackId")
@@ -223,142 +545,201 @@ class RealtimeSession:
             return True
         return False
 
+    async def _receive_json(self) -> Any:
+        message = await self.websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000), message.get("reason"))
+        data = message.get("text")
+        if data is None:
+            data = message.get("bytes") or b""
+        return orjson.loads(data)
+
     async def _recv_loop(self) -> None:
-        try:
-            while not self.is_stopped:
-                try:
-                    message = await self.websocket.receive_json()
-                except asyncio.CancelledError:
-                    raise
-                except WebSocketDisconnect:
-                    self._stop_event.set()
-                    break
-                except Exception:  # pragma: no cover - safety net
-                    self.logger.exception("Failed to receive message")
-                    self._stop_event.set()
-                    break
+        handlers = self.manager._handlers
+        while not self.is_stopped:
+            try:
+                message = await self._receive_json()
+            except asyncio.CancelledError:
+                raise
+            except WebSocketDisconnect:
+                self._mark_stopped()
+                break
+            except Exception:  # pragma: no cover - safety net
+                self.logger.exception("Failed to receive message")
+                self._mark_stopped()
+                break
 
-                if not isinstance(message, dict):
+            if not isinstance(message, dict):
+                continue
+
+            msg_type = message.get("type")
+            if type(msg_type) is not str:
+                msg_type = ""
+            elif msg_type not in _CONTROL_FRAME_TYPES and msg_type not in handlers:
+                # Control frames match case-insensitively; only unknown types
+                # pay for the case fold ("PING", "Pong", ...).
+                msg_type = msg_type.lower()
+            if msg_type == "pong":
+                self.last_pong_ns = time.monotonic_ns()
+                continue
+            if msg_type == "ping":
+                ts = time.time()
+                await self.send({"type": "pong", "ts": ts}, encoded=_PONG_FRAME % ts)
+                continue
+            if msg_type == "ack" or message.get("ack"):
+                if self._acknowledge(message):
                     continue
 
-                msg_type = str(message.get("type") or "").lower()
-                if msg_type == "pong":
-                    self.last_pong = time.monotonic()
-                    continue
-                if msg_type == "ping":
-                    await self.send({"type": "pong", "ts": time.time()})
-                    continue
-                if msg_type == "ack" or message.get("ack"):
-                    if self._acknowledge(message):
-                        continue
-
-                try:
-                    await self.manager.handle_message(self, message)
-                except asyncio.CancelledError:
-                    raise
-                except WebSocketDisconnect:
-                    self._stop_event.set()
-                    break
-                except Exception:  # pragma: no cover - guard rails
-                    self.logger.exception("Unhandled error while processing message")
-        finally:
-            self._stop_event.set()
+            try:
+                await self.manager.handle_message(self, message)
+            except asyncio.CancelledError:
+                raise
+            except WebSocketDisconnect:
+                self._mark_stopped()
+                break
+            except Exception:  # pragma: no cover - guard rails
+                self.logger.exception("Unhandled error while processing message")
 
     async def _send_loop(self) -> None:
-        try:
-            while not self.is_stopped:
-                try:
-                    outbound = await asyncio.wait_for(self.send_queue.get(), timeout=0.5)
-                except asyncio.TimeoutError:
-                    continue
-
-                try:
-                    await self.websocket.send_json(outbound.payload)
-                except asyncio.CancelledError:
-                    raise
-                except WebSocketDisconnect:
-                    self._stop_event.set()
-                    break
-                except RuntimeError as exc:
-                    message = str(exc)
-                    if "close message has been sent" in message:
-                        self.logger.debug("Send after close ignored: %s", message)
-                    else:
-                        self.logger.exception("Failed to send message", exc_info=exc)
-                    self._stop_event.set()
-                    break
-                except Exception:  # pragma: no cover - defensive
-                    self.logger.exception("Failed to send message")
-                    self._stop_event.set()
-                    break
-                finally:
-                    self.send_queue.task_done()
+        loop = asyncio.get_running_loop()
+        buffer = self._send_buffer
+        asgi_send = self._asgi_send
+        while not self.is_stopped:
+            if not buffer:
+                # Parked until send() enqueues a frame or the session stops.
+                self._send_waker = loop.create_future()
+                await self._send_waker
+                self._send_waker = None
+                continue
+
+            batch = [buffer.popleft()]
+            try:
+                frame = batch[0].encoded
+                if frame is None:
+                    frame = _encode_frame(batch[0].payload)
+                if buffer and self.supports_batch:
+                    frame = self._coalesce_backlog(frame, batch)
+                if asgi_send is None:
+                    await self.websocket.send_text(frame)
+                else:
+                    await asgi_send({"type": "websocket.send", "text": frame})
+            except asyncio.CancelledError:
+                raise
+            except (OSError, WebSocketDisconnect):
+                self._mark_stopped()
+                break
+            except RuntimeError as exc:
+                message = str(exc)
+                if "close message has been sent" in message:
+                    self.logger.debug("Send after close ignored: %s", message)
+                else:
+                    self.logger.exception("Failed to send message", exc_info=exc)
+                self._mark_stopped()
+                break
+            except Exception:  # pragma: no cover - defensive
+                self.logger.exception("Failed to send message")
+                self._mark_stopped()
+                break
 
+            for outbound in batch:
                 if outbound.require_ack and outbound.command_id:
-                    key = str(outbound.command_id)
-                    now = time.monotonic()
-                    pending = self.pending_acks.get(key)
-                    if pending and outbound.is_retry:
-                        pending.deadline = now + self.manager.ack_timeout
-                        pending.retries = outbound.retries
-                        pending.message = outbound
-                    else:
-                        self.pending_acks[key] = PendingAck(
-                            message=outbound,
-                            deadline=now + self.manager.ack_timeout,
-                            retries=outbound.retries,
-                        )
-        finally:
-            self._stop_event.set()
+                    self._track_ack(outbound)
+            if len(self.pending_acks) > self.manager.max_pending_acks:
+                # A client that never acks would otherwise grow this forever.
+                self.logger.warning(
+                    "%d unacknowledged messages; closing connection", len(self.pending_acks)
+                )
+                await self.close(code=1011, reason="too many pending acks")
+                break
+
+    def _coalesce_backlog(self, frame: str, batch: List[OutboundMessage]) -> str:
+        """Fold queued frames into one JSON array frame for batch-capable clients.
+
+        Only messages that are already waiting are merged, so an idle
+        connection still sends each message as soon as it is queued.
+        """
+
+        frames = [frame]
+        size = len(frame)
+        buffer = self._send_buffer
+        while buffer and size < WS_MAX_BATCH_SIZE:
+            outbound = buffer.popleft()
+            encoded = outbound.encoded
+            if encoded is None:
+                encoded = _encode_frame(outbound.payload)
+            frames.append(encoded)
+            batch.append(outbound)
+            size += len(encoded)
+        return f"[{','.join(frames)}]"
+
+    def _track_ack(self, outbound: OutboundMessage) -> None:
+        key = str(outbound.command_id)
+        deadline_ns = time.monotonic_ns() + self.manager.ack_timeout_ns
+        pending = self.pending_acks.get(key)
+        if pending and outbound.is_retry:
+            pending.deadline_ns = deadline_ns
+            pending.retries = outbound.retries
+            pending.message = outbound
+        else:
+            self.pending_acks[key] = PendingAck(
+                message=outbound,
+                deadline_ns=deadline_ns,
+                retries=outbound.retries,
+            )
+        heapq.heappush(self._ack_deadlines, (deadline_ns, key))
 
     async def _keepalive_loop(self) -> None:
         if self.manager.ping_interval <= 0:
             return
-        try:
-            while not self.is_stopped:
-                await asyncio.sleep(self.manager.ping_interval)
-                if self.is_stopped:
-                    break
-                await self.send({"type": "ping", "ts": time.time()})
-                if (time.monotonic() - self.last_pong) > self.manager.pong_timeout:
-                    self.logger.warning("Ping timeout; closing realtime session")
-                    await self.close(code=1011, reason="ping timeout")
-                    break
-        finally:
-            self._stop_event.set()
+        while not self.is_stopped:
+            await asyncio.sleep(self.manager.ping_interval)
+            if self.is_stopped:
+                break
+            ts = time.time()
+            await self.send({"type": "ping", "ts": ts}, encoded=_PING_FRAME % ts)
+            if time.monotonic_ns() - self.last_pong_ns > self.manager.pong_timeout_ns:
+                self.logger.warning("Ping timeout; closing realtime session")
+                await self.close(code=1011, reason="ping timeout")
+                break
 
     async def _monitor_pending_acks(self) -> None:
         if not self.supports_ack or self.manager.ack_timeout <= 0:
             return
-        try:
-            while not self.is_stopped:
-                await asyncio.sleep(self.manager.ack_timeout / 2)
-                now = time.monotonic()
-                for command_id, pending in list(self.pending_acks.items()):
-                    if now < pending.deadline:
-                        continue
-                    if pending.retries >= self.manager.max_ack_retries:
-                        self.logger.warning(
-                            "Ack timeout for %s; closing connection", command_id
-                        )
-                        await self.close(code=1011, reason="ack timeout")
-                        return
-                    pending.retries += 1
-                    retry_message = OutboundMessage(
-                        payload=dict(pending.message.payload),
-                        require_ack=True,
-                        command_id=command_id,
-                        allow_drop=False,
-                        is_retry=True,
-                        retries=pending.retries,
-                    )
-                    pending.message = retry_message
-                    pending.deadline = now + self.manager.ack_timeout
-                    if self.is_stopped:
-                        return
-                    await self.send_queue.put(retry_message)
-        finally:
-            self._stop_event.set()
+        deadlines = self._ack_deadlines
+        while not self.is_stopped:
+            now_ns = time.monotonic_ns()
+            # Entries added while sleeping expire at least ack_timeout from
+            # now, so an empty heap never needs an early wake-up.
+            delay_ns = deadlines[0][0] - now_ns if deadlines else self.manager.ack_timeout_ns
+            if delay_ns > 0:
+                await asyncio.sleep(delay_ns / 1e9)
+                continue
+            deadline_ns, command_id = heapq.heappop(deadlines)
+            pending = self.pending_acks.get(command_id)
+            if pending is None or pending.deadline_ns != deadline_ns:
+                # Acknowledged, or superseded by a later retry deadline.
+                continue
+            if pending.retries >= self.manager.max_ack_retries:
+                self.logger.warning(
+                    "Ack timeout for %s; closing connection", command_id
+                )
+                await self.close(code=1011, reason="ack timeout")
+                return
+            pending.retries += 1
+            retry_message = OutboundMessage(
+                payload=pending.message.payload,
+                require_ack=True,
+                command_id=command_id,
+                allow_drop=False,
+                is_retry=True,
+                retries=pending.retries,
+            )
+            pending.message = retry_message
+            pending.deadline_ns = now_ns + self.manager.ack_timeout_ns
+            heapq.heappush(deadlines, (pending.deadline_ns, command_id))
+            if self.is_stopped:
+                return
+            self._enqueue(retry_message)
 
 
 class RealtimeManager:
@@ -367,7 +748,7 @@ class RealtimeManager:
     def __init__(
         self,
         state: EngineState,
-        assets_loader: Callable[[], Dict[str, list]],
+        assets_loader: Callable[[], Any],
         on_mix_change: Callable[[], None],
         *,
         deck_manager: DeckManager,
@@ -376,8 +757,12 @@ class RealtimeManager:
         pong_timeout: float = 60.0,
         ack_timeout: float = 5.0,
         max_ack_retries: int = 3,
+        max_pending_acks: int = 1024,
+        max_buffered_messages: int = 4096,
         hello_timeout: float = 5.0,
         transport_tick_hz: float = 30.0,
+        max_concurrent_loads: int = 8,
+        state_broadcast_interval: float = 1 / 60,
     ) -> None:
         self.state = state
         self.assets_loader = assets_loader
@@ -387,28 +772,78 @@ class RealtimeManager:
         self.ping_interval = max(0.0, float(ping_interval))
         self.pong_timeout = max(self.ping_interval, float(pong_timeout))
         self.ack_timeout = max(0.0, float(ack_timeout))
+        self.ack_timeout_ns = int(self.ack_timeout * 1e9)
+        self.pong_timeout_ns = int(self.pong_timeout * 1e9)
         self.max_ack_retries = max(0, int(max_ack_retries))
+        self.max_pending_acks = max(1, int(max_pending_acks))
+        self.max_buffered_messages = max(1, int(max_buffered_messages))
         self.hello_timeout = max(0.1, float(hello_timeout))
         self.transport_tick_interval = 1.0 / max(1.0, float(transport_tick_hz))
+        self.state_broadcast_interval = max(0.0, float(state_broadcast_interval))
 
         self._sessions: Dict[str, RealtimeSession] = {}
-        self._deck_sessions: Dict[str, Set[RealtimeSession]] = defaultdict(set)
-        self._lock = asyncio.Lock()
+        # Read-mostly views replaced wholesale on (un)registration so a
+        # broadcast keeps iterating a consistent snapshot across its awaits.
+        self._session_view: Tuple[RealtimeSession, ...] = ()
+        self._deck_session_views: Dict[str, Tuple[RealtimeSession, ...]] = {}
+        # Pipeline mutations notify the media adapter synchronously, which may
+        # rebuild GStreamer branches; run them on one dedicated thread so they
+        # stay ordered and never queue behind the default pool's I/O work.
+        self._pipeline_executor = _new_pipeline_executor()
+        # Bounds deck loads in flight so a burst of loadDeck commands cannot
+        # pile up behind the pipeline thread and starve other work.
+        self._deck_load_semaphore = asyncio.Semaphore(max(1, int(max_concurrent_loads)))
         self._tick_task: Optional[asyncio.Task] = None
+        self._background_tasks: Set[asyncio.Task] = set()
+        self._latest_snapshot: Optional[Dict[str, Any]] = None
+        self._last_state_frames: Dict[str, str] = {}
+        # Coalesced droppable state broadcasts: message type -> (flush timer,
+        # session to exclude).
+        self._pending_state_broadcasts: Dict[
+            str, Tuple[asyncio.TimerHandle, Optional[RealtimeSession]]
+        ] = {}
+        self._snapshot_event = asyncio.Event()
         self._running = False
         self._loop: Optional[asyncio.AbstractEventLoop] = None
         self._timeline_subscription: Optional[int] = None
+        self._command_prefix = uuid.uuid4().hex[:8]
+        self._command_counter = itertools.count(1)
+        self._handlers: Dict[str, MessageHandler] = {
+            "register": self._handle_register,
+            "update-fallback-layers": self._handle_fallback_layers,
+            "update-control-settings": self._handle_control_settings,
+            "update-mix-deck": self._handle_mix_deck,
+            "update-crossfader": self._handle_crossfader,
+            "updateCrossfader": self._handle_crossfader,
+            "loadDeck": self._handle_load_deck,
+            "transport-command": self._handle_transport_command,
+            "start-visualization": self._handle_relay,
+            "stop-visualization": self._handle_relay,
+            "regenerate-shader": self._handle_relay,
+            "set-audio-sensitivity": self._handle_relay,
+            "viewer-status": self._handle_viewer_status,
+            "code-progress": self._handle_code_progress,
+            "deck-media-state": self._handle_deck_media_state,
+            "rtc-signal": self._handle_rtc_signal,
+        }
+
+    def next_command_id(self) -> str:
+        """Mint a server-side commandId that is unique for this manager."""
+
+        return f"{self._command_prefix}-{next(self._command_counter):x}"
 
     async def start(self) -> None:
         if self._running:
             return
         self._running = True
         self._loop = asyncio.get_running_loop()
+        LOG.info("Realtime manager running on %s", type(self._loop).__name__)
         if self._timeline_subscription is not None:
             self.state.timeline.unsubscribe(self._timeline_subscription)
             self._timeline_subscription = None
         self._timeline_subscription = self.state.timeline.subscribe(self._handle_timeline_snapshot)
         self._tick_task = asyncio.create_task(self._transport_tick_loop())
+        self._spawn(self._transport_broadcast_loop())
 
     async def stop(self) -> None:
         if not self._running:
@@ -425,6 +860,20 @@ class RealtimeManager:
             self.state.timeline.unsubscribe(self._timeline_subscription)
             self._timeline_subscription = None
 
+        for handle, _ in self._pending_state_broadcasts.values():
+            handle.cancel()
+        self._pending_state_broadcasts.clear()
+
+        background_tasks = list(self._background_tasks)
+        for task in background_tasks:
+            task.cancel()
+        await asyncio.gather(*background_tasks, return_exceptions=True)
+
+        # Release the pipeline thread. Executors spawn threads lazily, so the
+        # replacement costs nothing unless the manager is started again.
+        self._pipeline_executor.shutdown(wait=False, cancel_futures=True)
+        self._pipeline_executor = _new_pipeline_executor()
+
         self._loop = None
 
     def _handle_timeline_snapshot(self, snapshot) -> None:
@@ -440,8 +889,18 @@ class RealtimeManager:
     def _schedule_transport_broadcast(self, snapshot_dict: Dict[str, Any]) -> None:
         if not self._running:
             return
-
-        async def _broadcast() -> None:
+        # Only the newest snapshot matters to clients; bursts collapse into
+        # whatever the broadcaster picks up on its next pass.
+        self._latest_snapshot = snapshot_dict
+        self._snapshot_event.set()
+
+    async def _transport_broadcast_loop(self) -> None:
+        while self._running:
+            await self._snapshot_event.wait()
+            self._snapshot_event.clear()
+            snapshot_dict, self._latest_snapshot = self._latest_snapshot, None
+            if snapshot_dict is None:
+                continue
             try:
                 await self.broadcast(
                     {"type": "transport", "payload": snapshot_dict},
@@ -450,7 +909,13 @@ class RealtimeManager:
             except Exception:  # pragma: no cover - defensive
                 LOG.exception("Failed to broadcast transport snapshot.")
 
-        asyncio.create_task(_broadcast())
+    def _spawn(self, coro) -> asyncio.Task:
+        """Run ``coro`` in the background while keeping a strong reference to it."""
+
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
 
     async def _transport_tick_loop(self) -> None:
         try:
@@ -458,9 +923,7 @@ class RealtimeManager:
                 await asyncio.sleep(self.transport_tick_interval)
                 if not self._running:
                     break
-                async with self._lock:
-                    has_sessions = bool(self._sessions)
-                if not has_sessions:
+                if not self._session_view:
                     continue
                 mono_us = time.monotonic_ns() // 1000
                 snapshot = self.state.timeline.snapshot()
@@ -499,7 +962,8 @@ class RealtimeManager:
 
         client_info = hello.get("clientInfo")
         if isinstance(client_info, dict):
-            session.client_info = dict(client_info)
+            # Freshly decoded from the hello frame, so no copy is needed.
+            session.client_info = client_info
             role = client_info.get("role")
             if isinstance(role, str):
                 session.client_role = role
@@ -508,26 +972,27 @@ class RealtimeManager:
         if isinstance(role_override, str):
             session.client_role = role_override
 
+        # Features are normalised in one pass; batched array frames are
+        # opt-in because older clients parse one message per frame.
         features = hello.get("features")
-        supports_ack = False
         if isinstance(features, (list, tuple, set)):
-            supports_ack = any(str(item).lower() == "ack" for item in features)
+            feature_names = {str(item).lower() for item in features}
+            supports_ack = "ack" in feature_names
+            supports_batch = "batch" in feature_names
         elif isinstance(features, dict):
             supports_ack = bool(features.get("ack") or features.get("acks"))
-        elif features is not None:
+            supports_batch = bool(features.get("batch"))
+        else:
             supports_ack = bool(features)
+            supports_batch = False
 
         if not supports_ack:
-            supports_ack = bool(
-                hello.get("supportsAck")
-                or hello.get("requireAck")
-                or hello.get("acks")
-                or hello.get("ack")
-            )
+            supports_ack = any(hello.get(key) for key in _HELLO_ACK_KEYS)
 
         session.supports_ack = supports_ack and not legacy
+        session.supports_batch = supports_batch and not legacy
 
-        await self._register(session)
+        self._register(session)
         await self._send_initial_snapshot(session)
         LOG.info(
             "Realtime client connected deck=%s session=%s role=%s supports_ack=%s legacy=%s",
@@ -540,29 +1005,47 @@ class RealtimeManager:
         return True
 
     async def finalise_session(self, session: RealtimeSession) -> None:
-        await self._unregister(session)
+        self._unregister(session)
         LOG.info("Realtime client disconnected session=%s", session.session_id)
 
-    async def _register(self, session: RealtimeSession) -> None:
-        async with self._lock:
-            self._sessions[session.session_id] = session
-            self._deck_sessions[session.deck_id].add(session)
+    def _register(self, session: RealtimeSession) -> None:
+        # Registry updates never await, so they are atomic on the event loop
+        # and need no lock; readers only ever see a fully built view.
+        self._sessions[session.session_id] = session
+        self._session_view = tuple(self._sessions.values())
+        deck_view = self._deck_session_views.get(session.deck_id, ())
+        if session not in deck_view:
+            self._deck_session_views = {
+                **self._deck_session_views,
+                session.deck_id: deck_view + (session,),
+            }
 
-    async def _unregister(self, session: RealtimeSession) -> None:
-        async with self._lock:
-            self._sessions.pop(session.session_id, None)
-            deck_sessions = self._deck_sessions.get(session.deck_id)
-            if deck_sessions and session in deck_sessions:
-                deck_sessions.remove(session)
-                if not deck_sessions:
-                    self._deck_sessions.pop(session.deck_id, None)
+    def _unregister(self, session: RealtimeSession) -> None:
+        self._sessions.pop(session.session_id, None)
+        self._session_view = tuple(self._sessions.values())
+        deck_view = self._deck_session_views.get(session.deck_id, ())
+        if session in deck_view:
+            views = dict(self._deck_session_views)
+            remaining = tuple(member for member in deck_view if member is not session)
+            if remaining:
+                views[session.deck_id] = remaining
+            else:
+                views.pop(session.deck_id)
+            self._deck_session_views = views
 
     async def _send_initial_snapshot(self, session: RealtimeSession) -> None:
         try:
-            assets = await asyncio.to_thread(self.assets_loader)
+            # The loader reads no context variables, so skip to_thread's
+            # per-call copy_context().
+            loop = asyncio.get_running_loop()
+            assets = await loop.run_in_executor(None, self.assets_loader)
         except Exception:  # pragma: no cover - assets loading is best-effort
             LOG.exception("Failed to load fallback assets for init payload")
             assets = {}
+        # The state snapshot is taken on the loop right before queueing: it
+        # carries time-derived transport positions, and building it after
+        # registration guarantees it is never older than a broadcast this
+        # session has already queued.
         payload = {
             "type": "init",
             "deckId": session.deck_id,
@@ -581,198 +1064,238 @@ class RealtimeManager:
         deck_id: Optional[str] = None,
         require_ack: bool = False,
         allow_drop: bool = False,
-    ) -> None:
-        async with self._lock:
-            if deck_id is None:
-                targets = list(self._sessions.values())
-            else:
-                targets = list(self._deck_sessions.get(deck_id, set()))
+        encoded: Optional[str] = None,
+    ) -> bool:
+        """Queue ``message`` for every target; ``False`` if any did not take it."""
+
+        if deck_id is None:
+            targets = self._session_view
+        else:
+            targets = self._deck_session_views.get(deck_id, ())
 
         if exclude is not None:
             targets = [session for session in targets if session is not exclude]
 
         if not targets:
+            return True
+
+        # Frames that carry no per-recipient commandId are identical for every
+        # session, so serialise them once instead of once per connection.
+        if require_ack:
+            encoded = None
+        elif encoded is None:
+            encoded = _encode_frame(message)
+        # Queue synchronously: no Task or coroutine per recipient.
+        queued_all = True
+        for target in targets:
+            try:
+                queued = target.send_nowait(
+                    message,
+                    require_ack=require_ack,
+                    allow_drop=allow_drop,
+                    encoded=encoded,
+                )
+            except Exception:  # pragma: no cover - one bad session must not stop the rest
+                target.logger.exception("Failed to queue %s broadcast", message.get("type"))
+                queued = False
+            queued_all = queued_all and queued
+        return queued_all
+
+    async def _broadcast_state(
+        self,
+        message_type: str,
+        payload: Dict[str, Any],
+        *,
+        exclude: Optional[RealtimeSession],
+        allow_drop: bool,
+    ) -> None:
+        message = {"type": message_type, "payload": payload}
+        encoded = _encode_frame(message)
+        # Every session already holds the last full broadcast (or an init
+        # snapshot taken after it), so an identical frame would be a no-op.
+        if exclude is None and self._last_state_frames.get(message_type) == encoded:
             return
+        self._last_state_frames[message_type] = encoded
+        if not await self.broadcast(message, exclude=exclude, allow_drop=allow_drop, encoded=encoded):
+            # Some session shed the frame under backpressure; forget it so the
+            # next identical state reaches that session instead of being skipped.
+            self._last_state_frames.pop(message_type, None)
 
-        await asyncio.gather(
-            *[
-                target.send(dict(message), require_ack=require_ack, allow_drop=allow_drop)
-                for target in targets
-            ],
-            return_exceptions=True,
+    def _schedule_state_broadcast(
+        self,
+        message_type: str,
+        build_payload: Callable[[], Dict[str, Any]],
+        exclude: Optional[RealtimeSession],
+    ) -> None:
+        """Coalesce bursts of a droppable state broadcast into one per interval.
+
+        Only the latest state matters, so the payload is built when the timer
+        fires. Updates from different senders widen the broadcast to everyone.
+        """
+
+        pending = self._pending_state_broadcasts.get(message_type)
+        if pending is not None:
+            handle, pending_exclude = pending
+            if pending_exclude is not exclude:
+                self._pending_state_broadcasts[message_type] = (handle, None)
+            return
+        handle = asyncio.get_running_loop().call_later(
+            self.state_broadcast_interval,
+            self._flush_state_broadcast,
+            message_type,
+            build_payload,
         )
+        self._pending_state_broadcasts[message_type] = (handle, exclude)
 
-    async def broadcast_mix_state(self, *, exclude: Optional[RealtimeSession] = None) -> None:
-        await self.broadcast(
-            {"type": "mix-state", "payload": self.state.mix.to_dict()},
-            exclude=exclude,
-            allow_drop=True,
+    def _flush_state_broadcast(
+        self, message_type: str, build_payload: Callable[[], Dict[str, Any]]
+    ) -> None:
+        _, exclude = self._pending_state_broadcasts.pop(message_type)
+        self._spawn(
+            self._broadcast_state(message_type, build_payload(), exclude=exclude, allow_drop=True)
         )
 
+    async def broadcast_mix_state(self, *, exclude: Optional[RealtimeSession] = None) -> None:
+        self._schedule_state_broadcast("mix-state", self.state.mix.to_dict, exclude)
+
     async def broadcast_control_settings(self, *, exclude: Optional[RealtimeSession] = None) -> None:
-        await self.broadcast(
-            {"type": "control-settings", "payload": self.state.control_settings.to_dict()},
+        await self._broadcast_state(
+            "control-settings",
+            self.state.control_settings.to_dict(),
             exclude=exclude,
+            allow_drop=False,
         )
 
     async def broadcast_viewer_status(self, *, exclude: Optional[RealtimeSession] = None) -> None:
-        await self.broadcast(
-            {"type": "viewer-status", "payload": self.state.viewer_status.to_dict()},
-            exclude=exclude,
-            allow_drop=True,
-        )
+        self._schedule_state_broadcast("viewer-status", self.state.viewer_status.to_dict, exclude)
 
     async def handle_message(self, session: RealtimeSession, message: Dict[str, Any]) -> None:
         message_type = message.get("type")
         if not isinstance(message_type, str):
             return
 
-        if message_type == "register":
-            role = message.get("role")
-            if isinstance(role, str):
-                session.client_role = role
-            return
-
-        if message_type == "update-fallback-layers":
-            self.state.fallback_layers = message.get("payload") or []
-            await self.broadcast(
-                {"type": "fallback-layers", "payload": self.state.fallback_layers},
-                exclude=session,
-            )
-            return
+        handler = self._handlers.get(message_type)
+        if handler is not None:
+            await handler(session, message)
 
-        if message_type == "update-control-settings":
-            payload = message.get("payload") or {}
-            self.state.control_settings.update(payload)
-            await self.broadcast_control_settings(exclude=session)
-            return
+    async def _handle_register(self, session: RealtimeSession, message: Dict[str, Any]) -> None:
+        role = message.get("role")
+        if isinstance(role, str):
+            session.client_role = role
 
-        if message_type == "update-mix-deck":
-            payload = message.get("payload") or {}
-            deck = payload.get("deck")
-            data = payload.get("data") or {}
-            if deck and self.state.apply_deck_update(deck, data):
-                self.on_mix_change()
-                await self.broadcast_mix_state()
-            return
+    async def _handle_fallback_layers(self, session: RealtimeSession, message: Dict[str, Any]) -> None:
+        self.state.fallback_layers = message.get("payload") or []
+        await self.broadcast(
+            {"type": "fallback-layers", "payload": self.state.fallback_layers},
+            exclude=session,
+        )
 
-        if message_type in {"update-crossfader", "updateCrossfader"}:
-            payload = message.get("payload") or {}
-            if self.state.apply_crossfader_update(payload):
-                self.on_mix_change()
-                await self.broadcast_mix_state()
-            return
+    async def _handle_control_settings(self, session: RealtimeSession, message: Dict[str, Any]) -> None:
+        payload = message.get("payload") or {}
+        self.state.control_settings.update(payload)
+        await self.broadcast_control_settings(exclude=session)
 
-        if message_type == "loadDeck":
-            await self._handle_load_deck(session, message)
-            return
+    async def _handle_mix_deck(self, session: RealtimeSession, message: Dict[str, Any]) -> None:
+        payload = message.get("payload") or {}
+        deck = payload.get("deck")
+        data = payload.get("data") or {}
+        if deck and self.state.apply_deck_update(deck, data):
+            self.on_mix_change()
+            await self.broadcast_mix_state()
 
-        if message_type == "transport-command":
-            await self._handle_transport_command(session, message)
-            return
+    async def _handle_crossfader(self, session: RealtimeSession, message: Dict[str, Any]) -> None:
+        payload = message.get("payload") or {}
+        if self.state.apply_crossfader_update(payload):
+            self.on_mix_change()
+            await self.broadcast_mix_state()
 
-        if message_type in {
-            "start-visualization",
-            "stop-visualization",
-            "regenerate-shader",
-            "set-audio-sensitivity",
-        }:
-            await self.broadcast(message, exclude=session)
-            return
+    async def _handle_relay(self, session: RealtimeSession, message: Dict[str, Any]) -> None:
+        await self.broadcast(message, exclude=session)
 
-        if message_type == "viewer-status":
-            payload = message.get("payload") or {}
-            self.state.viewer_status.update(payload)
-            await self.broadcast_viewer_status(exclude=session)
-            return
+    async def _handle_code_progress(self, session: RealtimeSession, message: Dict[str, Any]) -> None:
+        await self.broadcast(message, exclude=session, allow_drop=True)
 
-        if message_type == "code-progress":
-            await self.broadcast(message, exclude=session, allow_drop=True)
-            return
+    async def _handle_viewer_status(self, session: RealtimeSession, message: Dict[str, Any]) -> None:
+        payload = message.get("payload") or {}
+        self.state.viewer_status.update(payload)
+        await self.broadcast_viewer_status(exclude=session)
 
-        if message_type == "deck-media-state":
-            if session.client_role != "controller":
-                LOG.warning(
-                    "Ignoring deck-media-state from non-controller session=%s role=%s",
-                    session.session_id,
-                    session.client_role,
-                )
-                return
-            payload = message.get("payload") or {}
-            deck = payload.get("deck")
-            state_payload = payload.get("state") or {}
-            command_id = str(message.get("commandId") or state_payload.get("commandId") or uuid.uuid4().hex)
-            if deck:
-                did_change, revision = self.state.update_deck_media_state(deck, state_payload)
-                state = self.state.deck_media_states.get(deck)
-                if state:
-                    state.last_command_id = command_id
-                    message_payload = {
-                        "type": "deck-media-state",
-                        "payload": {
-                            "deck": deck,
-                            "state": state.to_dict(),
-                            "revision": revision,
-                            "commandId": command_id,
-                        },
-                    }
-                    if did_change:
-                        await session.send(
-                            message_payload,
-                            require_ack=True,
-                            command_id=command_id,
-                        )
-                        await self.broadcast(message_payload, exclude=session)
-                    else:
-                        await session.send(
-                            message_payload,
-                            require_ack=True,
-                            command_id=command_id,
-                        )
+    async def _handle_deck_media_state(self, session: RealtimeSession, message: Dict[str, Any]) -> None:
+        if session.client_role != "controller":
+            LOG.warning(
+                "Ignoring deck-media-state from non-controller session=%s role=%s",
+                session.session_id,
+                session.client_role,
+            )
             return
-
-        if message_type == "rtc-signal":
-            rtc_type = str(message.get("rtc") or "").lower()
-            if rtc_type in {"offer", "answer", "ice-candidate", "request-offer"}:
-                await self.broadcast(
-                    {
-                        "type": "rtc-signal",
-                        "rtc": rtc_type,
-                        "payload": message.get("payload"),
+        payload = message.get("payload") or {}
+        deck = payload.get("deck")
+        state_payload = payload.get("state") or {}
+        command_id = str(message.get("commandId") or state_payload.get("commandId") or self.next_command_id())
+        if deck:
+            did_change, revision = self.state.update_deck_media_state(deck, state_payload)
+            state = self.state.deck_media_states.get(deck)
+            if state:
+                state.last_command_id = command_id
+                message_payload = {
+                    "type": "deck-media-state",
+                    "payload": {
+                        "deck": deck,
+                        "state": state.to_dict(),
+                        "revision": revision,
+                        "commandId": command_id,
                     },
-                    exclude=session,
-                )
-            return
+                }
+                if did_change:
+                    await session.send(
+                        message_payload,
+                        require_ack=True,
+                        command_id=command_id,
+                    )
+                    await self.broadcast(message_payload, exclude=session)
+                else:
+                    await session.send(
+                        message_payload,
+                        require_ack=True,
+                        command_id=command_id,
+                    )
+
+    async def _handle_rtc_signal(self, session: RealtimeSession, message: Dict[str, Any]) -> None:
+        rtc_type = str(message.get("rtc") or "").lower()
+        if rtc_type in {"offer", "answer", "ice-candidate", "request-offer"}:
+            await self.broadcast(
+                {
+                    "type": "rtc-signal",
+                    "rtc": rtc_type,
+                    "payload": message.get("payload"),
+                },
+                exclude=session,
+            )
 
     @staticmethod
     def _extract_position_us(payload: Dict[str, Any]) -> Optional[int]:
-        micro_keys = ("position_us", "positionUs", "pos_us", "posUs")
-        for key in micro_keys:
-            if key in payload and payload[key] is not None:
-                try:
-                    return max(0, int(float(payload[key])))
-                except (TypeError, ValueError):
-                    continue
-
-        second_keys = ("position_s", "positionSeconds", "position", "seconds")
-        for key in second_keys:
-            if key in payload and payload[key] is not None:
-                try:
-                    seconds = float(payload[key])
-                except (TypeError, ValueError):
-                    continue
-                microseconds = int(round(seconds * 1_000_000))
-                return max(0, microseconds)
+        for key, scale in _POSITION_KEY_SCALES:
+            value = payload.get(key)
+            if value is None:
+                continue
+            try:
+                position = float(value)
+                position_us = int(position) if scale == 1 else int(round(position * scale))
+            except (TypeError, ValueError, OverflowError):
+                continue
+            return max(0, position_us)
         return None
 
     @staticmethod
     def _extract_rate(payload: Dict[str, Any]) -> Optional[float]:
-        for key in ("rate", "value", "playRate", "speed"):
-            if key in payload and payload[key] is not None:
-                try:
-                    return float(payload[key])
-                except (TypeError, ValueError):
-                    continue
+        for key in schemas.RATE_KEYS:
+            value = payload.get(key)
+            if value is None:
+                continue
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                continue
         return None
 
     async def _handle_transport_command(
@@ -790,65 +1313,32 @@ class RealtimeManager:
 
         payload = message.get("payload") or {}
         op_value = payload.get("op") or payload.get("operation")
-        command_id = str(message.get("commandId") or payload.get("commandId") or uuid.uuid4().hex)
+        command_id = str(message.get("commandId") or payload.get("commandId") or self.next_command_id())
 
         if not isinstance(op_value, str) or not op_value.strip():
-            await session.send(
-                {
-                    "type": "transport-error",
-                    "commandId": command_id,
-                    "payload": {
-                        "code": "E_INVALID_PAYLOAD",
-                        "message": "transport-command requires payload.op",
-                    },
-                }
-            )
+            await self._send_transport_error(session, command_id, "missing_op")
             return
 
-        rev_value = None
-        for key in ("expected_rev", "expectedRev", "rev"):
-            if key in payload:
-                rev_value = payload.get(key)
-                break
+        snake_key, camel_key, short_key = schemas.EXPECTED_REV_KEYS
+        rev_value = payload.get(snake_key, payload.get(camel_key, payload.get(short_key)))
         if rev_value is None:
-            await session.send(
-                {
-                    "type": "transport-error",
-                    "commandId": command_id,
-                    "payload": {
-                        "code": "E_INVALID_PAYLOAD",
-                        "message": "transport-command requires payload.expected_rev",
-                    },
-                }
-            )
+            await self._send_transport_error(session, command_id, "missing_rev")
             return
 
-        try:
-            expected_rev = int(rev_value)
-        except (TypeError, ValueError):
-            await session.send(
-                {
-                    "type": "transport-error",
-                    "commandId": command_id,
-                    "payload": {
-                        "code": "E_INVALID_PAYLOAD",
-                        "message": "payload.expected_rev must be an integer",
-                    },
-                }
-            )
+        if type(rev_value) is int:
+            # Decoded JSON integers: the common case needs no conversion.
+            expected_rev = rev_value
+        else:
+            try:
+                expected_rev = int(rev_value)
+            except (TypeError, ValueError):
+                expected_rev = None
+        if expected_rev is None:
+            await self._send_transport_error(session, command_id, "rev_not_int")
             return
 
         if expected_rev < 0:
-            await session.send(
-                {
-                    "type": "transport-error",
-                    "commandId": command_id,
-                    "payload": {
-                        "code": "E_INVALID_PAYLOAD",
-                        "message": "payload.expected_rev must be non-negative",
-                    },
-                }
-            )
+            await self._send_transport_error(session, command_id, "negative_rev")
             return
 
         position_us = self._extract_position_us(payload)
@@ -863,28 +1353,16 @@ class RealtimeManager:
             )
         except RevisionMismatch as exc:
             await session.send(
-                {
-                    "type": "transport-error",
-                    "commandId": command_id,
-                    "payload": {
-                        "code": "E_REVISION_MISMATCH",
-                        "message": str(exc),
-                        "transport": self.state.timeline.snapshot().to_dict(),
-                    },
-                }
+                _transport_error(
+                    command_id,
+                    "E_REVISION_MISMATCH",
+                    str(exc),
+                    transport=self.state.timeline.snapshot().to_dict(),
+                )
             )
             return
         except InvalidCommand as exc:
-            await session.send(
-                {
-                    "type": "transport-error",
-                    "commandId": command_id,
-                    "payload": {
-                        "code": "E_INVALID_COMMAND",
-                        "message": str(exc),
-                    },
-                }
-            )
+            await session.send(_transport_error(command_id, "E_INVALID_COMMAND", str(exc)))
             return
 
         await session.send(
@@ -897,6 +1375,21 @@ class RealtimeManager:
             command_id=command_id,
         )
 
+    async def _send_transport_error(
+        self, session: RealtimeSession, command_id: str, error: str
+    ) -> None:
+        """Reply with one of the fixed payload-validation errors."""
+
+        payload = _TRANSPORT_ERROR_PAYLOADS[error]
+        frame = (
+            f'{{"type":"transport-error","commandId":{_encode_frame(command_id)}'
+            f"{_TRANSPORT_ERROR_SUFFIXES[error]}"
+        )
+        await session.send(
+            {"type": "transport-error", "commandId": command_id, "payload": payload},
+            encoded=frame,
+        )
+
     async def _handle_load_deck(self, session: RealtimeSession, message: Dict[str, Any]) -> None:
         deck_id = str(message.get("deckId") or session.deck_id or "default")
         command_id = message.get("commandId")
@@ -921,15 +1414,16 @@ class RealtimeManager:
         if deck_state and deck_state.apply_request({"isLoading": True}):
             await self._broadcast_deck_state(deck_id, exclude=None)
 
-        issued_command_id = str(command_id or uuid.uuid4().hex)
+        issued_command_id = str(command_id or self.next_command_id())
 
         try:
-            handle, _ = await self.deck_manager.load(
-                deck_id,
-                src,
-                issued_command_id,
-                self._build_deck_instance,
-            )
+            async with self._deck_load_semaphore:
+                handle, _ = await self.deck_manager.load(
+                    deck_id,
+                    src,
+                    issued_command_id,
+                    self._build_deck_instance,
+                )
         except DeckLoadError as exc:
             if deck_state and deck_state.apply_request({"isLoading": False, "error": True}):
                 await self._broadcast_deck_state(deck_id, exclude=None)
@@ -949,14 +1443,17 @@ class RealtimeManager:
             return
 
         if deck_state:
-            deck_state.apply_request({"intent": "source", "src": src})
-            deck_state.apply_request({"isLoading": False, "error": False})
             revision = handle.metadata.get("revision")
             if revision is not None:
                 try:
                     deck_state.last_load_revision = int(revision)
                 except (TypeError, ValueError):
                     pass
+            # One merged request: a single version bump covers the new source,
+            # the cleared loading/error flags and the load revision.
+            deck_state.apply_request(
+                {"intent": "source", "src": src, "isLoading": False, "error": False}
+            )
             await self._broadcast_deck_state(deck_id, exclude=None)
 
         response = {
@@ -997,14 +1494,15 @@ class RealtimeManager:
                 "revision": revision,
             }
 
-        return await asyncio.to_thread(_commit)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pipeline_executor, _commit)
 
 
 def create_app(
     *,
     state: Optional[EngineState] = None,
     config: Optional[EngineConfig] = None,
-    lifespan: Optional[Callable[..., object]] = None,
+    lifespan: Optional[Callable[[FastAPI], AsyncContextManager[Any]]] = None,
 ) -> FastAPI:
     engine_state = state or EngineState()
 
@@ -1015,12 +1513,35 @@ def create_app(
 
     realtime = RealtimeManager(
         engine_state,
-        assets_loader=read_fallback_assets,
+        assets_loader=_encoded_fallback_assets,
         on_mix_change=refresh_mixer_layers,
         deck_manager=deck_manager,
     )
 
-    app = FastAPI(title="MuLoom Engine API", lifespan=lifespan)
+    @contextlib.asynccontextmanager
+    async def app_lifespan(app: FastAPI) -> AsyncIterator[Any]:
+        # FastAPI skips on_event hooks once a lifespan is passed, and serve()
+        # always passes one, so engine startup/shutdown wraps it instead.
+        _configure_thread_pools()
+        # One pooled client for /proxy/media so repeated fetches reuse
+        # keep-alive connections instead of paying DNS + TLS every time.
+        app.state.proxy_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(30.0, connect=10.0),
+            follow_redirects=True,
+            limits=httpx.Limits(max_keepalive_connections=100, max_connections=200),
+        )
+        await realtime.start()
+        try:
+            if lifespan is None:
+                yield None
+            else:
+                async with lifespan(app) as lifespan_state:
+                    yield lifespan_state
+        finally:
+            await realtime.stop()
+            await app.state.proxy_client.aclose()
+
+    app = FastAPI(title="MuLoom Engine API", lifespan=app_lifespan)
     app.add_middleware(
         CORSMiddleware,
         allow_origins=["*"],
@@ -1029,95 +1550,92 @@ def create_app(
         allow_headers=["*"],
     )
 
-    @app.on_event("startup")
-    async def _startup() -> None:
-        await realtime.start()
-
-    @app.on_event("shutdown")
-    async def _shutdown() -> None:
-        await realtime.stop()
-
-    app.mount(
-        "/assets/mp4",
-        StaticFiles(directory=str(MP4_DIR), check_dir=False),
-        name="mp4-assets",
-    )
-
     @app.websocket("/realtime")
     async def websocket_endpoint(websocket: WebSocket) -> None:
         await realtime.run(websocket)
 
-    @app.get("/healthz")
-    async def healthz() -> dict:
-        return {"status": "ok", "profile": engine_state.active_profile}
+    @app.get("/healthz", response_class=ORJSONResponse)
+    async def healthz() -> Response:
+        return ORJSONResponse({"status": "ok", "profile": engine_state.active_profile})
 
-    @app.get("/profiles")
-    async def list_profiles() -> dict:
+    @app.get("/profiles", response_class=ORJSONResponse)
+    async def list_profiles() -> Response:
         try:
-            with PROFILES_PATH.open("r", encoding="utf-8") as handle:
-                profiles = yaml.safe_load(handle) or {}
+            profiles = _load_profiles(PROFILES_PATH, PROFILES_PATH.stat().st_mtime_ns)
         except FileNotFoundError:
             profiles = {}
-        return {"profiles": profiles}
+        return ORJSONResponse({"profiles": profiles})
 
     @app.get("/assets", response_model=schemas.AssetCollection)
-    async def list_assets() -> schemas.AssetCollection:
-        return schemas.AssetCollection(**read_fallback_assets())
+    async def list_assets(request: Request) -> Response:
+        return _asset_listing_response(request)
 
     @app.get("/api/fallback-assets", response_model=schemas.AssetCollection)
-    async def list_fallback_assets() -> schemas.AssetCollection:
-        return schemas.AssetCollection(**read_fallback_assets())
+    async def list_fallback_assets(request: Request) -> Response:
+        return _asset_listing_response(request)
 
     @app.get("/proxy/media")
-    async def proxy_media(url: str) -> Response:
+    async def proxy_media(request: Request, url: str) -> Response:
         try:
-            target = httpx.URL(url)
-        except Exception:
-            raise HTTPException(status_code=400, detail="Invalid url") from None
-
-        if target.scheme not in {"http", "https"}:
-            raise HTTPException(status_code=400, detail="Unsupported scheme")
-
-        timeout = httpx.Timeout(30.0, connect=10.0)
-        headers = {"User-Agent": "MuLoomProxy/1.0"}
-
-        async with httpx.AsyncClient(timeout=timeout, follow_redirects=True) as client:
-            try:
-                upstream = await client.stream("GET", target, headers=headers)
-            except httpx.HTTPError as exc:  # pragma: no cover
-                raise HTTPException(status_code=502, detail=f"Upstream fetch failed: {exc}") from exc
-
-            if upstream.status_code >= 400:
-                detail = f"Upstream returned {upstream.status_code}"
-                raise HTTPException(status_code=upstream.status_code, detail=detail)
+            target = _proxy_target(url)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from None
 
-            content_type = upstream.headers.get("content-type", "application/octet-stream")
-            content_length = upstream.headers.get("content-length")
-
-            async def upstream_iterator():
-                async for chunk in upstream.aiter_bytes():
-                    yield chunk
-
-            response_headers = {"Content-Type": content_type}
-            if content_length is not None:
-                response_headers["Content-Length"] = content_length
-
-            background = BackgroundTask(upstream.aclose)
-            return StreamingResponse(upstream_iterator(), headers=response_headers, background=background)
-
-    @app.get("/api/state")
-    async def get_full_state() -> dict:
-        return {
-            "state": engine_state.snapshot(),
-            "assets": read_fallback_assets(),
+        client: httpx.AsyncClient = app.state.proxy_client
+        # The body is relayed still encoded, so only ask upstream for
+        # encodings the browser itself accepts.
+        headers = {
+            **PROXY_HEADERS,
+            "Accept-Encoding": request.headers.get("accept-encoding", "identity"),
         }
+        upstream_request = client.build_request("GET", target, headers=headers)
+        try:
+            upstream = await client.send(upstream_request, stream=True)
+        except httpx.HTTPError as exc:  # pragma: no cover
+            raise HTTPException(status_code=502, detail=f"Upstream fetch failed: {exc}") from exc
+
+        if upstream.status_code >= 400:
+            await upstream.aclose()
+            detail = f"Upstream returned {upstream.status_code}"
+            raise HTTPException(status_code=upstream.status_code, detail=detail)
+
+        content_type = upstream.headers.get("content-type", "application/octet-stream")
+        content_length = upstream.headers.get("content-length")
+        content_encoding = upstream.headers.get("content-encoding")
+
+        # Bytes are relayed exactly as received (no decompression), so the
+        # upstream Content-Length and Content-Encoding still describe them.
+        response_headers = {"Content-Type": content_type}
+        if content_length is not None:
+            response_headers["Content-Length"] = content_length
+        if content_encoding is not None:
+            response_headers["Content-Encoding"] = content_encoding
+
+        background = BackgroundTask(upstream.aclose)
+        return StreamingResponse(
+            upstream.aiter_raw(chunk_size=1 << 16), headers=response_headers, background=background
+        )
+
+    @app.get("/api/state", response_class=ORJSONResponse)
+    async def get_full_state() -> Response:
+        return ORJSONResponse(
+            {
+                "state": engine_state.snapshot(),
+                "assets": _encoded_fallback_assets(),
+            }
+        )
 
-    @app.get("/engine/transport")
-    async def get_transport_state() -> dict:
-        return engine_state.timeline.snapshot().to_dict()
+    @app.get("/engine/transport", response_class=ORJSONResponse)
+    async def get_transport_state() -> Response:
+        return ORJSONResponse(engine_state.timeline.snapshot().to_dict())
 
-    @app.post("/engine/command")
-    async def apply_transport(payload: schemas.TransportCommandRequest) -> dict:
+    @app.post(
+        "/engine/command",
+        response_class=ORJSONResponse,
+        openapi_extra=_json_request_body(schemas.TransportCommandRequest),
+    )
+    async def apply_transport(request: Request) -> Response:
+        payload = await _validate_body(request, schemas.TRANSPORT_ADAPTER)
         try:
             snapshot_dict = engine_state.apply_transport_command(
                 payload.op,
@@ -1129,27 +1647,13 @@ def create_app(
             raise HTTPException(status_code=409, detail=str(exc)) from exc
         except InvalidCommand as exc:
             raise HTTPException(status_code=400, detail=str(exc)) from exc
-        return {"transport": snapshot_dict}
+        return ORJSONResponse({"transport": snapshot_dict})
 
     @app.get("/mix", response_model=schemas.MixStateModel)
-    async def get_mix() -> schemas.MixStateModel:
-        snapshot = engine_state.mix.to_dict()
-        decks = {
-            key: schemas.DeckModel(
-                type=data["type"],
-                asset_id=data.get("assetId"),
-                opacity=data["opacity"],
-                enabled=data["enabled"],
-            )
-            for key, data in snapshot["decks"].items()
-        }
-        return schemas.MixStateModel(
-            crossfaderAB=snapshot["crossfaderAB"],
-            crossfaderAC=snapshot["crossfaderAC"],
-            crossfaderBD=snapshot["crossfaderBD"],
-            crossfaderCD=snapshot["crossfaderCD"],
-            decks=decks,
-        )
+    async def get_mix() -> Response:
+        # MixState.to_dict() already emits the aliased, clamped wire shape, so
+        # skip building models; response_model only documents it.
+        return ORJSONResponse(engine_state.mix.to_dict())
 
     @app.post("/mix/decks/{deck_id}")
     async def update_deck(
@@ -1192,8 +1696,9 @@ def create_app(
         return {"ok": True, "job": payload.dict()}
 
     @app.get("/control-settings", response_model=schemas.ControlSettingsModel)
-    async def get_control_settings() -> schemas.ControlSettingsModel:
-        return schemas.ControlSettingsModel(**engine_state.control_settings.to_dict())
+    async def get_control_settings() -> Response:
+        # to_dict() already coerces every field, matching the model's shape.
+        return ORJSONResponse(engine_state.control_settings.to_dict())
 
     @app.post("/control-settings")
     async def update_control_settings(payload: schemas.ControlSettingsModel) -> dict:
@@ -1202,8 +1707,8 @@ def create_app(
         return {"ok": True}
 
     @app.get("/viewer-status", response_model=schemas.ViewerStatusModel)
-    async def get_viewer_status() -> schemas.ViewerStatusModel:
-        return schemas.ViewerStatusModel(**engine_state.viewer_status.to_dict())
+    async def get_viewer_status() -> Response:
+        return ORJSONResponse(engine_state.viewer_status.to_dict())
 
     @app.post("/viewer-status")
     async def update_viewer_status(payload: schemas.ViewerStatusModel) -> dict:
@@ -1211,7 +1716,33 @@ def create_app(
         await realtime.broadcast_viewer_status()
         return {"ok": True}
 
-    range_regex = re.compile(r"bytes=(\d*)-(\d*)$")
+    mp4_root = MP4_DIR.resolve()
+    open_files = _OpenFileCache()
+
+    # Replaces a StaticFiles mount over MP4_DIR and keeps its semantics: the
+    # path is normalised rather than trimmed, anything outside the root is a
+    # plain 404, and FileResponse handles Range/If-Range (multipart included).
+    @app.api_route(
+        "/assets/mp4/{requested_path:path}", methods=["GET", "HEAD"], include_in_schema=False
+    )
+    async def serve_mp4_asset(request: Request, requested_path: str) -> Response:
+        relative = os.path.normpath(os.path.join(*requested_path.split("/")))
+        absolute_path = (mp4_root / relative).resolve()
+        if not absolute_path.is_relative_to(mp4_root):
+            raise HTTPException(status_code=404)
+        try:
+            file_stat = absolute_path.stat()
+        except (OSError, ValueError):
+            raise HTTPException(status_code=404) from None
+        if not stat.S_ISREG(file_stat.st_mode):
+            raise HTTPException(status_code=404)
+
+        response = FileResponse(absolute_path, stat_result=file_stat)
+        etag = response.headers["etag"]
+        last_modified = response.headers["last-modified"]
+        if _not_modified(request, etag, last_modified):
+            return Response(status_code=304, headers={"ETag": etag, "Last-Modified": last_modified})
+        return response
 
     @app.get("/stream/mp4/{requested_path:path}", response_class=StreamingResponse)
     async def stream_mp4(request: Request, requested_path: str) -> Response:
@@ -1219,108 +1750,192 @@ def create_app(
         if not trimmed:
             raise HTTPException(status_code=404, detail="Video not found")
 
-        normalized = os.path.normpath(trimmed).lstrip("/\\")
-        if ".." in normalized.split(os.sep):
+        if _PARENT_SEGMENT.search(trimmed):
             raise HTTPException(status_code=400, detail="Invalid video path")
 
-        absolute_path = (MP4_DIR / normalized).resolve()
-        try:
-            mp4_root = MP4_DIR.resolve(strict=False)
-        except FileNotFoundError:
-            mp4_root = MP4_DIR
-        if not str(absolute_path).startswith(str(mp4_root)):
+        absolute_path = (mp4_root / trimmed.lstrip("/\\")).resolve()
+        if not absolute_path.is_relative_to(mp4_root):
             raise HTTPException(status_code=400, detail="Invalid video path")
 
-        if not absolute_path.exists() or not absolute_path.is_file():
+        try:
+            file_stat = absolute_path.stat()
+        except OSError:
+            raise HTTPException(status_code=404, detail="Video not found") from None
+        if not stat.S_ISREG(file_stat.st_mode):
             raise HTTPException(status_code=404, detail="Video not found")
+        file_size = file_stat.st_size
+        # MP4_DIR may hold other containers, so derive the type from the
+        # suffix rather than assuming MP4.
+        media_type = mimetypes.guess_type(absolute_path.name)[0] or "application/octet-stream"
 
-        file_size = absolute_path.stat().st_size
         range_header = request.headers.get("range")
 
         if not range_header:
-            return StreamingResponse(
-                _file_iterator(absolute_path),
-                media_type="video/mp4",
-                headers={
-                    "Content-Length": str(file_size),
-                    "Accept-Ranges": "bytes",
-                },
+            # FileResponse lets servers that implement the ASGI pathsend
+            # extension hand the file to sendfile(2) directly.
+            response = FileResponse(
+                absolute_path,
+                media_type=media_type,
+                headers={"Accept-Ranges": "bytes"},
+                stat_result=file_stat,
             )
-
-        match = range_regex.match(range_header)
-        if not match:
-            return Response(
-                status_code=416,
-                headers={"Content-Range": f"bytes */{file_size}"},
-            )
-
-        start_str, end_str = match.groups()
-        if start_str == "" and end_str:
-            try:
-                suffix_length = int(end_str)
-            except ValueError:
-                return Response(
-                    status_code=416,
-                    headers={"Content-Range": f"bytes */{file_size}"},
-                )
-            if suffix_length <= 0:
-                return Response(
-                    status_code=416,
-                    headers={"Content-Range": f"bytes */{file_size}"},
-                )
-            end = file_size - 1
-            start = max(0, file_size - suffix_length)
-        else:
-            try:
-                start = int(start_str or 0)
-                end = int(end_str or file_size - 1)
-            except ValueError:
-                return Response(
-                    status_code=416,
-                    headers={"Content-Range": f"bytes */{file_size}"},
-                )
-            if start < 0 or end < start:
+            etag = response.headers["etag"]
+            last_modified = response.headers["last-modified"]
+            if _not_modified(request, etag, last_modified):
                 return Response(
-                    status_code=416,
-                    headers={"Content-Range": f"bytes */{file_size}"},
+                    status_code=304,
+                    headers={"ETag": etag, "Last-Modified": last_modified, "Accept-Ranges": "bytes"},
                 )
-            end = min(end, file_size - 1)
+            return response
 
-        if start >= file_size:
-            return Response(
-                status_code=416,
-                headers={"Content-Range": f"bytes */{file_size}"},
-            )
+        byte_range = _parse_range(range_header, file_size)
+        if byte_range is None:
+            return Response(status_code=416, headers={"Content-Range": f"bytes */{file_size}"})
+        start, end = byte_range
 
         chunk_size = end - start + 1
         headers = {
             "Content-Range": f"bytes {start}-{end}/{file_size}",
             "Accept-Ranges": "bytes",
             "Content-Length": str(chunk_size),
-            "Content-Type": "video/mp4",
+            "Content-Type": media_type,
         }
 
+        if hasattr(os, "pread"):
+            try:
+                shared = await open_files.get(absolute_path, file_stat)
+            except OSError:
+                raise HTTPException(status_code=404, detail="Video not found") from None
+            body = _pread_iterator(shared, start=start, length=chunk_size)
+        else:  # pragma: no cover - platforms without positional reads
+            body = _file_iterator(absolute_path, start=start, length=chunk_size)
+
         return StreamingResponse(
-            _file_iterator(absolute_path, start=start, length=chunk_size),
+            body,
             status_code=206,
             headers=headers,
-            media_type="video/mp4",
+            media_type=media_type,
         )
 
     return app
 
 
-def _file_iterator(path: Path, *, start: int = 0, length: Optional[int] = None, chunk_size: int = 1 << 20):
-    with path.open("rb") as handle:
+def _is_byte_offset(value: str) -> bool:
+    # Empty is allowed (open-ended or suffix ranges); isascii() keeps
+    # characters such as "²" that pass isdigit() away from int().
+    return not value or (value.isascii() and value.isdigit())
+
+
+def _parse_range(header: str, file_size: int) -> Optional[Tuple[int, int]]:
+    """Resolve a single ``bytes=`` range against ``file_size``.
+
+    Returns the inclusive ``(start, end)`` pair, or ``None`` when the header
+    is malformed or the range cannot be satisfied.
+    """
+
+    if not header.startswith("bytes="):
+        return None
+    start_str, separator, end_str = header[6:].partition("-")
+    if not separator or not _is_byte_offset(start_str) or not _is_byte_offset(end_str):
+        return None
+    last = file_size - 1
+    if start_str:
+        # "bytes=N-" and "bytes=N-M": what players send when seeking.
+        start = int(start_str)
+        end = int(end_str) if end_str else last
+        if start > last or end < start:
+            return None
+        return start, min(end, last)
+    if end_str:
+        suffix_length = int(end_str)
+        if suffix_length <= 0 or last < 0:
+            return None
+        return max(0, file_size - suffix_length), last
+    return (0, last) if last >= 0 else None
+
+
+def _file_iterator(
+    path: Path, *, start: int = 0, length: Optional[int] = None, chunk_size: int = MP4_CHUNK_SIZE
+):
+    # Plain generator: StreamingResponse drives it from the threadpool, so the
+    # blocking reads never stall the event loop. Unbuffered, so each read()
+    # lands straight in the bytes object handed to the server.
+    with path.open("rb", buffering=0) as handle:
+        if hasattr(os, "posix_fadvise"):
+            with contextlib.suppress(OSError):
+                os.posix_fadvise(handle.fileno(), start, length or 0, os.POSIX_FADV_SEQUENTIAL)
         handle.seek(start)
         remaining = length
+        read_size = chunk_size - start % chunk_size
         while True:
             if remaining is not None and remaining <= 0:
                 break
-            read_size = chunk_size if remaining is None else min(chunk_size, remaining)
-            data = handle.read(read_size)
+            data = handle.read(read_size if remaining is None else min(read_size, remaining))
             if not data:
                 break
             yield data
             if remaining is not None:
                 remaining -= len(data)
+            read_size = chunk_size
+
+
+class _SharedFile:
+    """Read-only descriptor shared by concurrent range responses.
+
+    Readers use positional reads, so they never contend over a file offset.
+    The descriptor is closed once the cache and every in-flight response have
+    dropped their reference.
+    """
+
+    __slots__ = ("fd", "signature")
+
+    def __init__(self, path: Path, signature: Tuple[int, int, int]) -> None:
+        self.fd = -1
+        self.signature = signature
+        self.fd = os.open(path, os.O_RDONLY)
+        if hasattr(os, "posix_fadvise"):
+            with contextlib.suppress(OSError):
+                os.posix_fadvise(self.fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
+    def __del__(self) -> None:
+        if self.fd < 0:
+            return
+        with contextlib.suppress(OSError):
+            os.close(self.fd)
+
+
+class _OpenFileCache:
+    """Small LRU of open MP4 descriptors so seeking players skip open()/close()."""
+
+    def __init__(self, max_entries: int = 32) -> None:
+        self._entries: OrderedDict[Path, _SharedFile] = OrderedDict()
+        self._max_entries = max_entries
+
+    async def get(self, path: Path, file_stat: os.stat_result) -> _SharedFile:
+        signature = (file_stat.st_ino, file_stat.st_mtime_ns, file_stat.st_size)
+        entry = self._entries.get(path)
+        if entry is None or entry.signature != signature:
+            # open() can stall on cold or network-backed media; only the
+            # descriptor is opened off the loop, the LRU itself stays on it.
+            entry = await run_in_threadpool(_SharedFile, path, signature)
+            self._entries[path] = entry
+        self._entries.move_to_end(path)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+
+def _pread_iterator(
+    shared: _SharedFile, *, start: int, length: int, chunk_size: int = MP4_CHUNK_SIZE
+):
+    offset = start
+    end = start + length
+    # The first read stops at a chunk boundary so the rest stay aligned.
+    read_size = chunk_size - start % chunk_size
+    while offset < end:
+        data = os.pread(shared.fd, min(read_size, end - offset), offset)
+        if not data:
+            break
+        yield data
+        offset += len(data)
+        read_size = chunk_size
@@ -9,7 +9,7 @@ from collections import deque
 from dataclasses import dataclass, field
 import logging
 import time
-from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
 
 from ..graph.mixers import MixerLayer
 from ..pipeline import Pipeline
@@ -22,10 +22,12 @@ LOG = logging.getLogger(__name__)
 
 
 def clamp01(value: float) -> float:
-    return max(0.0, min(1.0, float(value)))
+    value = float(value)
+    # Comparison chain instead of max/min builtins; NaN falls through to 1.0.
+    return 0.0 if value < 0.0 else value if value <= 1.0 else 1.0
 
 
-@dataclass
+@dataclass(slots=True)
 class DeckState:
     type: str | None = None
     asset_id: str | None = None
@@ -66,7 +68,7 @@ class DeckState:
             self.asset_id = None
 
 
-@dataclass
+@dataclass(slots=True)
 class MixState:
     crossfader_ab: float = 0.5
     crossfader_ac: float = 0.5
@@ -371,6 +373,7 @@ class DeckManager:
         self._command_order: deque[str] = deque()
         self._grace_period = max(0.0, float(grace_period))
         self._command_cache_size = max(16, int(command_cache))
+        self._background_tasks: Set[asyncio.Task] = set()
 
     async def current(self, deck_id: str) -> Optional[DeckHandle]:
         """Return the active handle for ``deck_id`` if one exists."""
@@ -444,7 +447,9 @@ class DeckManager:
                 retired = self._retired.setdefault(deck_id, deque())
                 retired.append(previous)
                 if self._grace_period:
-                    asyncio.create_task(self._finalise_after_grace(deck_id, previous))
+                    task = asyncio.create_task(self._finalise_after_grace(deck_id, previous))
+                    self._background_tasks.add(task)
+                    task.add_done_callback(self._background_tasks.discard)
                 else:
                     retired.clear()
 
@@ -14,11 +14,10 @@ import asyncio
 import logging
 import signal
 from contextlib import asynccontextmanager
-from typing import AsyncIterator, Optional
+from typing import AsyncIterator, Callable, Optional
 
 from . import EngineConfig
 from .api.state import EngineState
-from .api.server import create_app
 from .runtime.gst_adapter import GStreamerPipelineAdapter
 from .utils.logging import configure_logging
 
@@ -55,6 +54,8 @@ async def serve(config: EngineConfig, host: str = "127.0.0.1", port: int = 8080)
 
     import uvicorn
 
+    from .api.server import create_app
+
     engine_state = EngineState()
     gst_adapter = GStreamerPipelineAdapter(engine_state.pipeline, timeline=engine_state.timeline)
     configure_logging()
@@ -108,12 +109,23 @@ def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
     return parser.parse_args(argv)
 
 
+def _event_loop_factory() -> Optional[Callable[[], asyncio.AbstractEventLoop]]:
+    """Prefer uvloop when it is installed; fall back to the stdlib loop."""
+
+    try:
+        import uvloop
+    except ImportError:
+        return None
+    return uvloop.new_event_loop
+
+
 def run(argv: Optional[list[str]] = None) -> None:
     args = parse_args(argv)
     config = EngineConfig(profile=args.profile)
 
     try:
-        asyncio.run(serve(config=config, host=args.host, port=args.port))
+        with asyncio.Runner(loop_factory=_event_loop_factory()) as runner:
+            runner.run(serve(config=config, host=args.host, port=args.port))
     except KeyboardInterrupt:
         LOG.info("Engine interrupted by user.")
 
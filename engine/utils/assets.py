@@ -7,7 +7,7 @@ from __future__ import annotations
 import os
 from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
 ENV_ROOT_VAR = "MULOOM_ROOT"
 
@@ -130,3 +130,32 @@ def read_fallback_assets() -> Dict[str, List[dict]]:
         "videos": _read_mp4_assets(),
         "overlays": [],
     }
+
+
+def _directory_signature(directory: Path, *, files_suffix: Optional[str]) -> List[Tuple[str, int]]:
+    try:
+        entries = [(str(directory), directory.stat().st_mtime_ns)]
+        with os.scandir(directory) as iterator:
+            for entry in iterator:
+                if files_suffix is not None:
+                    if entry.name.endswith(files_suffix) and entry.is_file():
+                        entries.append((entry.path, entry.stat().st_mtime_ns))
+                elif entry.is_dir():
+                    entries.append((entry.path, entry.stat().st_mtime_ns))
+    except OSError:
+        return []
+    return entries
+
+
+def fallback_assets_signature() -> Tuple[Tuple[str, int], ...]:
+    """
+    Cheap change-detection key for :func:`read_fallback_assets`.
+
+    GLSL sources are embedded in the payload, so each shader contributes its own
+    mtime.  The MP4 listing only depends on directory contents, which is covered
+    by the mtimes of ``mp4/`` and its category directories.
+    """
+
+    entries = _directory_signature(GLSL_DIR, files_suffix=".glsl")
+    entries.extend(_directory_signature(MP4_DIR, files_suffix=None))
+    return tuple(sorted(entries))
@@ -0,0 +1,483 @@
+"""Tests covering the REST control surface."""
+
+from __future__ import annotations
+
+import contextlib
+import gzip
+import os
+from pathlib import Path
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from engine.api.server import create_app
+from engine.api.state import EngineState
+from engine.utils import assets
+
+
+@pytest.fixture
+def asset_root(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    (tmp_path / "glsl").mkdir()
+    (tmp_path / "mp4" / "loops").mkdir(parents=True)
+    monkeypatch.setattr(assets, "GLSL_DIR", tmp_path / "glsl")
+    monkeypatch.setattr(assets, "MP4_DIR", tmp_path / "mp4")
+    return tmp_path
+
+
+def _client(state: EngineState | None = None) -> TestClient:
+    return TestClient(create_app(state=state or EngineState()))
+
+
+def test_get_mix_reflects_engine_state() -> None:
+    state = EngineState()
+    state.apply_crossfader_update({"target": "ac", "value": 0.8})
+    state.apply_deck_update("b", {"type": "video", "assetId": "clip.mp4", "opacity": 0.4})
+
+    body = _client(state).get("/mix").json()
+
+    assert body["crossfaderAC"] == 0.8
+    assert body["decks"]["b"] == {
+        "type": "video",
+        "assetId": "clip.mp4",
+        "opacity": 0.4,
+        "enabled": False,
+    }
+
+
+def test_control_settings_round_trip() -> None:
+    client = _client()
+
+    response = client.post(
+        "/control-settings",
+        json={"modelProvider": "openai", "audioInputMode": "microphone", "prompt": "neon"},
+    )
+    assert response.status_code == 200
+
+    body = client.get("/control-settings").json()
+    assert body == {"modelProvider": "openai", "audioInputMode": "microphone", "prompt": "neon"}
+
+
+def test_viewer_status_round_trip() -> None:
+    client = _client()
+
+    client.post("/viewer-status", json={"isRunning": True, "audioSensitivity": -1})
+
+    body = client.get("/viewer-status").json()
+    assert body["isRunning"] is True
+    assert body["audioSensitivity"] == 0.0
+
+
+def test_healthz_reports_active_profile() -> None:
+    response = _client().get("/healthz")
+
+    assert response.headers["content-type"] == "application/json"
+    assert response.json()["status"] == "ok"
+
+
+def test_list_assets_shape() -> None:
+    body = _client().get("/assets").json()
+
+    assert set(body) == {"glsl", "videos", "overlays"}
+
+
+def test_engine_command_applies_transport_op() -> None:
+    client = _client()
+
+    response = client.post("/engine/command", json={"op": "PLAY", "expectedRev": 0})
+
+    assert response.status_code == 200
+    transport = response.json()["transport"]
+    assert transport["playing"] is True
+    assert transport["rev"] == 1
+
+
+def test_engine_command_rejects_unknown_op() -> None:
+    response = _client().post("/engine/command", json={"op": "rewind", "rev": 0})
+
+    assert response.status_code == 422
+
+
+def test_list_assets_refreshes_when_sources_change(asset_root: Path) -> None:
+    client = _client()
+    shader = asset_root / "glsl" / "wave.glsl"
+    shader.write_text("void main() {}")
+    (asset_root / "mp4" / "loops" / "intro.mp4").write_bytes(b"")
+
+    first = client.get("/api/fallback-assets").json()
+    assert first["glsl"][0]["code"] == "void main() {}"
+    assert first["videos"][0]["url"] == "/stream/mp4/loops/intro.mp4"
+    assert "url" not in first["glsl"][0]
+    assert "code" not in first["videos"][0]
+
+    shader.write_text("void main() { gl_FragColor = vec4(1.0); }")
+    stat = shader.stat()
+    os.utime(shader, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    second = client.get("/assets").json()
+    assert second["glsl"][0]["code"] == "void main() { gl_FragColor = vec4(1.0); }"
+
+
+def test_engine_command_reports_body_errors() -> None:
+    response = _client().post("/engine/command", content=b'{"op": "seek"}')
+
+    assert response.status_code == 422
+    locs = [error["loc"] for error in response.json()["detail"]]
+    assert ["body", "expected_rev"] in locs
+
+
+def test_list_assets_honours_if_none_match(asset_root: Path) -> None:
+    client = _client()
+    (asset_root / "glsl" / "wave.glsl").write_text("void main() {}")
+
+    first = client.get("/assets")
+    etag = first.headers["etag"]
+
+    cached = client.get("/assets", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    (asset_root / "mp4" / "outro.mp4").write_bytes(b"")
+    os.utime(asset_root / "mp4", ns=(0, 10**18))
+
+    refreshed = client.get("/assets", headers={"If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert refreshed.headers["etag"] != etag
+
+
+def test_full_state_embeds_cached_assets(asset_root: Path) -> None:
+    (asset_root / "glsl" / "wave.glsl").write_text("void main() {}")
+
+    response = _client().get("/api/state")
+
+    assert response.headers["content-type"] == "application/json"
+    body = response.json()
+    assert body["assets"]["glsl"] == [{"id": "wave.glsl", "name": "wave", "code": "void main() {}"}]
+    assert body["state"]["mixState"]["crossfaderAB"] == 0.5
+
+
+def test_transport_state_endpoint() -> None:
+    body = _client().get("/engine/transport").json()
+
+    assert body["playing"] is False
+    assert body["rev"] == 0
+
+
+@pytest.fixture
+def mp4_file(asset_root: Path, monkeypatch: pytest.MonkeyPatch) -> bytes:
+    from engine.api import server
+
+    monkeypatch.setattr(server, "MP4_DIR", asset_root / "mp4")
+    data = bytes(range(256)) * 64
+    (asset_root / "mp4" / "loops" / "intro.mp4").write_bytes(data)
+    return data
+
+
+def test_stream_mp4_serves_whole_file(mp4_file: bytes) -> None:
+    response = _client().get("/stream/mp4/loops/intro.mp4")
+
+    assert response.status_code == 200
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["content-type"] == "video/mp4"
+    assert response.content == mp4_file
+
+
+def test_assets_mp4_serves_files_and_ranges(mp4_file: bytes) -> None:
+    client = _client()
+
+    assert client.get("/assets/mp4/loops/intro.mp4").content == mp4_file
+    partial = client.get("/assets/mp4/loops/intro.mp4", headers={"Range": "bytes=0-9"})
+    assert partial.status_code == 206
+    assert partial.content == mp4_file[:10]
+    assert client.head("/assets/mp4/loops/intro.mp4").headers["content-length"] == str(len(mp4_file))
+
+
+def test_assets_mp4_keeps_static_files_semantics(asset_root: Path, mp4_file: bytes) -> None:
+    (asset_root / "mp4" / "loops" / " padded.mp4").write_bytes(b"padded")
+    client = _client()
+
+    assert client.get("/assets/mp4/loops/%20padded.mp4").content == b"padded"
+    assert client.get("/assets/mp4/loops/padded.mp4").status_code == 404
+    assert client.get("/assets/mp4/loops%2F..%2Floops%2Fintro.mp4").content == mp4_file
+    assert client.get("/assets/mp4/..%2F..%2Fetc%2Fpasswd").status_code == 404
+    assert client.get("/assets/mp4/loops").status_code == 404
+
+    multi = client.get("/assets/mp4/loops/intro.mp4", headers={"Range": "bytes=0-1,4-5"})
+    assert multi.status_code == 206
+    assert multi.headers["content-type"].startswith("multipart/byteranges")
+    assert mp4_file[0:2] in multi.content and mp4_file[4:6] in multi.content
+
+
+def test_stream_mp4_revalidates_with_etag(asset_root: Path, mp4_file: bytes) -> None:
+    client = _client()
+    etag = client.get("/stream/mp4/loops/intro.mp4").headers["etag"]
+
+    cached = client.get("/stream/mp4/loops/intro.mp4", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    os.utime(asset_root / "mp4" / "loops" / "intro.mp4", ns=(0, 10**18))
+    refreshed = client.get("/stream/mp4/loops/intro.mp4", headers={"If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert refreshed.content == mp4_file
+
+
+def test_stream_mp4_revalidates_with_last_modified(asset_root: Path, mp4_file: bytes) -> None:
+    client = _client()
+    last_modified = client.get("/assets/mp4/loops/intro.mp4").headers["last-modified"]
+
+    cached = client.get("/assets/mp4/loops/intro.mp4", headers={"If-Modified-Since": last_modified})
+    assert cached.status_code == 304
+    assert cached.headers["last-modified"] == last_modified
+
+    path = asset_root / "mp4" / "loops" / "intro.mp4"
+    mtime = path.stat().st_mtime + 3600
+    os.utime(path, (mtime, mtime))
+    refreshed = client.get("/assets/mp4/loops/intro.mp4", headers={"If-Modified-Since": last_modified})
+    assert refreshed.status_code == 200
+    assert refreshed.content == mp4_file
+
+
+def test_assets_mp4_derives_media_type_from_suffix(asset_root: Path, mp4_file: bytes) -> None:
+    (asset_root / "mp4" / "loops" / "outro.webm").write_bytes(b"webm")
+    client = _client()
+
+    assert client.get("/assets/mp4/loops/outro.webm").headers["content-type"] == "video/webm"
+    partial = client.get("/assets/mp4/loops/outro.webm", headers={"Range": "bytes=0-1"})
+    assert partial.headers["content-type"] == "video/webm"
+    assert client.get("/assets/mp4/loops/intro.mp4").headers["content-type"] == "video/mp4"
+
+
+def test_stream_mp4_serves_byte_ranges(mp4_file: bytes) -> None:
+    client = _client()
+
+    partial = client.get("/stream/mp4/loops/intro.mp4", headers={"Range": "bytes=10-19"})
+    assert partial.status_code == 206
+    assert partial.headers["content-range"] == f"bytes 10-19/{len(mp4_file)}"
+    assert partial.content == mp4_file[10:20]
+
+    suffix = client.get("/stream/mp4/loops/intro.mp4", headers={"Range": "bytes=-5"})
+    assert suffix.content == mp4_file[-5:]
+
+    unsatisfiable = client.get(
+        "/stream/mp4/loops/intro.mp4", headers={"Range": f"bytes={len(mp4_file)}-"}
+    )
+    assert unsatisfiable.status_code == 416
+
+
+def test_stream_mp4_rejects_traversal(mp4_file: bytes) -> None:
+    client = _client()
+
+    assert client.get("/stream/mp4/loops/missing.mp4").status_code == 404
+    assert client.get("/stream/mp4/..%2F..%2Fetc%2Fpasswd").status_code == 400
+
+
+def test_stream_mp4_ranges_follow_file_replacement(asset_root: Path, mp4_file: bytes) -> None:
+    client = _client()
+    video = asset_root / "mp4" / "loops" / "intro.mp4"
+    assert client.get("/stream/mp4/loops/intro.mp4", headers={"Range": "bytes=0-3"}).content == mp4_file[:4]
+
+    video.write_bytes(b"fresh-bytes")
+    os.utime(video, ns=(0, 10**18))
+
+    response = client.get("/stream/mp4/loops/intro.mp4", headers={"Range": "bytes=0-4"})
+    assert response.content == b"fresh"
+
+
+class _UpstreamBody(httpx.AsyncByteStream):
+    """Unread response body, as a real transport hands it to the client."""
+
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+
+    async def __aiter__(self):
+        yield self.data
+
+
+def test_proxy_media_streams_through_shared_client() -> None:
+    def upstream(request: httpx.Request) -> httpx.Response:
+        assert request.headers["user-agent"] == "MuLoomProxy/1.0"
+        if request.url.path == "/missing":
+            return httpx.Response(404)
+        return httpx.Response(
+            200, stream=_UpstreamBody(b"frame-data"), headers={"content-type": "video/mp4"}
+        )
+
+    app = create_app(state=EngineState())
+    with TestClient(app) as client:
+        app.state.proxy_client = httpx.AsyncClient(transport=httpx.MockTransport(upstream))
+
+        response = client.get("/proxy/media", params={"url": "https://cdn.example/clip.mp4"})
+        missing = client.get("/proxy/media", params={"url": "https://cdn.example/missing"})
+        rejected = client.get("/proxy/media", params={"url": "ftp://cdn.example/clip.mp4"})
+
+    assert response.status_code == 200
+    assert response.content == b"frame-data"
+    assert response.headers["content-type"] == "video/mp4"
+    assert missing.status_code == 404
+    assert rejected.status_code == 400
+
+
+def test_proxy_media_relays_encoded_bodies_untouched() -> None:
+    payload = b"subtitle-track" * 64
+    compressed = gzip.compress(payload)
+
+    def upstream(request: httpx.Request) -> httpx.Response:
+        if "gzip" not in request.headers["accept-encoding"]:
+            return httpx.Response(
+                200, stream=_UpstreamBody(payload), headers={"content-type": "text/vtt"}
+            )
+        return httpx.Response(
+            200,
+            stream=_UpstreamBody(compressed),
+            headers={
+                "content-type": "text/vtt",
+                "content-encoding": "gzip",
+                "content-length": str(len(compressed)),
+            },
+        )
+
+    app = create_app(state=EngineState())
+    with TestClient(app) as client:
+        app.state.proxy_client = httpx.AsyncClient(transport=httpx.MockTransport(upstream))
+        response = client.get(
+            "/proxy/media",
+            params={"url": "https://cdn.example/subs.vtt"},
+            headers={"Accept-Encoding": "gzip"},
+        )
+        identity = client.get(
+            "/proxy/media",
+            params={"url": "https://cdn.example/subs.vtt"},
+            headers={"Accept-Encoding": "identity"},
+        )
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["content-length"] == str(len(compressed))
+    assert response.content == payload
+    assert "content-encoding" not in identity.headers
+    assert identity.content == payload
+
+
+def test_proxy_media_works_under_a_custom_lifespan(monkeypatch: pytest.MonkeyPatch) -> None:
+    events: list[str] = []
+
+    @contextlib.asynccontextmanager
+    async def lifespan(_app):
+        events.append("startup")
+        yield
+        events.append("shutdown")
+
+    def upstream(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(
+            200, stream=_UpstreamBody(b"frame-data"), headers={"content-type": "video/mp4"}
+        )
+
+    async_client = httpx.AsyncClient
+    monkeypatch.setattr(
+        httpx,
+        "AsyncClient",
+        lambda **kwargs: async_client(**kwargs, transport=httpx.MockTransport(upstream)),
+    )
+
+    app = create_app(state=EngineState(), lifespan=lifespan)
+    with TestClient(app) as client:
+        assert events == ["startup"]
+        response = client.get("/proxy/media", params={"url": "https://cdn.example/clip.mp4"})
+
+    assert response.status_code == 200
+    assert response.content == b"frame-data"
+    assert events == ["startup", "shutdown"]
+    assert app.state.proxy_client.is_closed
+
+
+def test_list_profiles_reloads_after_edit(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    from engine.api import server
+
+    profiles = tmp_path / "profiles.yaml"
+    profiles.write_text("default:\n  fps: 30\n")
+    monkeypatch.setattr(server, "PROFILES_PATH", profiles)
+    client = _client()
+
+    assert client.get("/profiles").json() == {"profiles": {"default": {"fps": 30}}}
+
+    profiles.write_text("default:\n  fps: 60\n")
+    os.utime(profiles, ns=(0, 10**18))
+    assert client.get("/profiles").json() == {"profiles": {"default": {"fps": 60}}}
+
+    profiles.unlink()
+    assert client.get("/profiles").json() == {"profiles": {}}
+
+
+@pytest.mark.parametrize(
+    ("header", "expected"),
+    [
+        ("bytes=100-", (100, 999)),
+        ("bytes=10-19", (10, 19)),
+        ("bytes=990-5000", (990, 999)),
+        ("bytes=-10", (990, 999)),
+        ("bytes=-5000", (0, 999)),
+        ("bytes=1000-", None),
+        ("bytes=20-10", None),
+        ("bytes=-0", None),
+        ("bytes=1-2,5-6", None),
+        ("bytes=１-2", None),
+        ("bytes=²-", None),
+        ("bytes=1-2\n", None),
+        ("bytes=", None),
+        ("items=0-1", None),
+    ],
+)
+def test_parse_range(header: str, expected: tuple[int, int] | None) -> None:
+    from engine.api.server import _parse_range
+
+    assert _parse_range(header, 1000) == expected
+
+
+def test_shared_file_open_failure_leaves_nothing_to_close(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    import sys
+
+    from engine.api.server import _SharedFile
+
+    unraisable: list = []
+    monkeypatch.setattr(sys, "unraisablehook", unraisable.append)
+
+    with pytest.raises(OSError):
+        _SharedFile(tmp_path / "missing.mp4", (0, 0, 0))
+
+    assert unraisable == []
+
+
+@pytest.mark.parametrize("raw, expected", [("12", 12), ("0", 64), ("-3", 64), ("lots", 64)])
+def test_thread_pool_size_falls_back_on_invalid_env(
+    monkeypatch: pytest.MonkeyPatch, raw: str, expected: int
+) -> None:
+    import anyio.to_thread
+
+    monkeypatch.setenv("MULOOM_THREAD_POOL", raw)
+
+    with _client() as client:
+        total_tokens = client.portal.call(
+            lambda: anyio.to_thread.current_default_thread_limiter().total_tokens
+        )
+
+    assert total_tokens == expected
+
+
+def test_thread_pool_size_applies_under_a_custom_lifespan(monkeypatch: pytest.MonkeyPatch) -> None:
+    import anyio.to_thread
+
+    seen: list[int] = []
+
+    @contextlib.asynccontextmanager
+    async def lifespan(_app):
+        seen.append(anyio.to_thread.current_default_thread_limiter().total_tokens)
+        yield
+
+    monkeypatch.setenv("MULOOM_THREAD_POOL", "12")
+
+    with TestClient(create_app(state=EngineState(), lifespan=lifespan)):
+        pass
+
+    assert seen == [12]
@@ -0,0 +1,487 @@
+"""Tests covering the realtime WebSocket session protocol."""
+
+from __future__ import annotations
+
+import asyncio
+import gc
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from engine.api.server import RealtimeManager, RealtimeSession, create_app
+from engine.api.state import DeckManager, EngineState
+
+
+class _RecordingWebSocket:
+    def __init__(self) -> None:
+        self.frames: list[str] = []
+        self.close_code: int | None = None
+
+    async def send_text(self, data: str) -> None:
+        self.frames.append(data)
+
+    async def close(self, code: int = 1000, reason: str | None = None) -> None:
+        self.close_code = code
+
+
+def _receive_until(websocket, message_type: str) -> dict:
+    while True:
+        message = websocket.receive_json()
+        if message.get("type") == message_type:
+            return message
+
+
+def test_hello_receives_init_snapshot() -> None:
+    state = EngineState()
+    with TestClient(create_app(state=state)) as client:
+        with client.websocket_connect("/realtime") as websocket:
+            websocket.send_json({"type": "hello", "deckId": "a", "role": "controller"})
+
+            init = _receive_until(websocket, "init")
+
+    assert init["deckId"] == "a"
+    assert set(init["payload"]) == {"state", "assets"}
+    assert set(init["payload"]["assets"]) == {"glsl", "videos", "overlays"}
+    assert init["payload"]["state"]["mixState"]["crossfaderAB"] == 0.5
+
+
+def test_crossfader_update_is_broadcast_as_text_frame() -> None:
+    with TestClient(create_app(state=EngineState())) as client:
+        with client.websocket_connect("/realtime") as websocket:
+            websocket.send_json({"type": "hello", "role": "controller"})
+            _receive_until(websocket, "init")
+
+            websocket.send_json(
+                {"type": "update-crossfader", "payload": {"target": "ab", "value": 0.25}}
+            )
+            message = _receive_until(websocket, "mix-state")
+
+    assert message["payload"]["crossfaderAB"] == 0.25
+
+
+def test_droppable_messages_respect_queue_size() -> None:
+    async def scenario() -> list:
+        manager = RealtimeManager(
+            EngineState(), dict, lambda: None, deck_manager=DeckManager(), queue_size=1
+        )
+        session = RealtimeSession(manager, websocket=None, queue_size=1)  # type: ignore[arg-type]
+        await session.send({"type": "transport-tick"}, allow_drop=True)
+        await session.send({"type": "transport-tick"}, allow_drop=True)
+        await session.send({"type": "transport"})
+        return [message.payload["type"] for message in session._send_buffer]
+
+    assert asyncio.run(scenario()) == ["transport-tick", "transport"]
+
+
+def test_send_loop_exits_when_session_stops() -> None:
+    async def scenario() -> None:
+        manager = RealtimeManager(EngineState(), dict, lambda: None, deck_manager=DeckManager())
+        session = RealtimeSession(manager, websocket=None, queue_size=1)  # type: ignore[arg-type]
+        sender = asyncio.create_task(session._send_loop())
+        await asyncio.sleep(0)
+
+        session._mark_stopped()
+        await asyncio.wait_for(sender, timeout=1.0)
+
+    asyncio.run(scenario())
+
+
+def test_binary_json_frames_are_decoded() -> None:
+    with TestClient(create_app(state=EngineState())) as client:
+        with client.websocket_connect("/realtime") as websocket:
+            websocket.send_bytes(b'{"type": "hello", "deckId": "b"}')
+
+            init = _receive_until(websocket, "init")
+
+    assert init["deckId"] == "b"
+
+
+def test_transport_changes_are_broadcast() -> None:
+    with TestClient(create_app(state=EngineState())) as client:
+        with client.websocket_connect("/realtime") as websocket:
+            websocket.send_json({"type": "hello", "role": "viewer"})
+            _receive_until(websocket, "init")
+
+            client.post("/engine/command", json={"op": "play", "rev": 0})
+            message = _receive_until(websocket, "transport")
+
+    assert message["payload"]["playing"] is True
+    assert message["payload"]["rev"] == 1
+
+
+def test_unacknowledged_messages_are_retried_then_closed() -> None:
+    async def scenario() -> _RecordingWebSocket:
+        manager = RealtimeManager(
+            EngineState(),
+            dict,
+            lambda: None,
+            deck_manager=DeckManager(),
+            ack_timeout=0.02,
+            max_ack_retries=1,
+        )
+        websocket = _RecordingWebSocket()
+        session = RealtimeSession(manager, websocket, queue_size=8)  # type: ignore[arg-type]
+        session.supports_ack = True
+        sender = asyncio.create_task(session._send_loop())
+        await session.send({"type": "load-deck"}, require_ack=True, command_id="cmd-1")
+
+        await asyncio.wait_for(session._monitor_pending_acks(), timeout=1.0)
+        await asyncio.wait_for(sender, timeout=1.0)
+        return websocket
+
+    websocket = asyncio.run(scenario())
+
+    assert len(websocket.frames) == 2
+    assert websocket.close_code == 1011
+
+
+def test_pending_acks_are_bounded() -> None:
+    async def scenario() -> _RecordingWebSocket:
+        manager = RealtimeManager(
+            EngineState(), dict, lambda: None, deck_manager=DeckManager(), max_pending_acks=2
+        )
+        websocket = _RecordingWebSocket()
+        session = RealtimeSession(manager, websocket, queue_size=8)  # type: ignore[arg-type]
+        session.supports_ack = True
+        for index in range(3):
+            await session.send({"type": "load-deck"}, require_ack=True, command_id=f"cmd-{index}")
+
+        await asyncio.wait_for(session._send_loop(), timeout=1.0)
+        return websocket
+
+    websocket = asyncio.run(scenario())
+
+    assert len(websocket.frames) == 3
+    assert websocket.close_code == 1011
+
+
+def test_send_buffer_is_bounded_for_stalled_clients() -> None:
+    async def scenario() -> tuple:
+        manager = RealtimeManager(
+            EngineState(), dict, lambda: None, deck_manager=DeckManager(), max_buffered_messages=2
+        )
+        websocket = _RecordingWebSocket()
+        session = RealtimeSession(manager, websocket, queue_size=1)  # type: ignore[arg-type]
+        queued = [session.send_nowait({"type": "deck-state", "index": index}) for index in range(3)]
+        await asyncio.sleep(0)
+        return queued, len(session._send_buffer), session.is_stopped, websocket.close_code
+
+    queued, buffered, stopped, close_code = asyncio.run(scenario())
+
+    assert queued == [True, True, False]
+    assert buffered == 2
+    assert stopped
+    assert close_code == 1011
+
+
+def test_server_command_ids_are_unique() -> None:
+    manager = RealtimeManager(EngineState(), dict, lambda: None, deck_manager=DeckManager())
+
+    first, second = manager.next_command_id(), manager.next_command_id()
+
+    assert first != second
+    assert first.split("-")[0] == second.split("-")[0]
+
+
+def test_deck_session_views_track_registration() -> None:
+    async def scenario() -> None:
+        manager = RealtimeManager(EngineState(), dict, lambda: None, deck_manager=DeckManager())
+        sessions = []
+        for deck_id in ("a", "a", "b"):
+            session = RealtimeSession(manager, websocket=None, queue_size=1)  # type: ignore[arg-type]
+            session.deck_id = deck_id
+            manager._register(session)
+            sessions.append(session)
+
+        assert manager._deck_session_views["a"] == (sessions[0], sessions[1])
+        before = manager._deck_session_views
+
+        manager._unregister(sessions[2])
+
+        assert "b" not in manager._deck_session_views
+        assert before["b"] == (sessions[2],)
+        assert manager._session_view == (sessions[0], sessions[1])
+
+    asyncio.run(scenario())
+
+
+def test_transport_payload_extraction() -> None:
+    extract_position = RealtimeManager._extract_position_us
+
+    assert extract_position({"posUs": "1500.7"}) == 1500
+    assert extract_position({"position": 1.5}) == 1_500_000
+    assert extract_position({"positionUs": "bad", "seconds": 2}) == 2_000_000
+    assert extract_position({"position_us": -5}) == 0
+    assert extract_position({"posUs": "nan", "seconds": 1}) == 1_000_000
+    assert extract_position({"posUs": float("inf")}) is None
+    assert extract_position({"position": "-inf"}) is None
+    assert extract_position({}) is None
+    assert RealtimeManager._extract_rate({"rate": None, "speed": "2"}) == 2.0
+
+
+def test_ping_is_answered_with_pong() -> None:
+    with TestClient(create_app(state=EngineState())) as client:
+        with client.websocket_connect("/realtime") as websocket:
+            websocket.send_json({"type": "hello"})
+            _receive_until(websocket, "init")
+
+            websocket.send_json({"type": "ping"})
+            pong = _receive_until(websocket, "pong")
+            websocket.send_json({"type": "PING"})
+            shouted = _receive_until(websocket, "pong")
+
+    assert isinstance(pong["ts"], float)
+    assert isinstance(shouted["ts"], float)
+
+
+def test_identical_state_broadcasts_are_skipped() -> None:
+    async def scenario() -> list:
+        state = EngineState()
+        manager = RealtimeManager(state, dict, lambda: None, deck_manager=DeckManager())
+        session = RealtimeSession(manager, websocket=None, queue_size=8)  # type: ignore[arg-type]
+        manager._register(session)
+
+        async def broadcast() -> None:
+            await manager._broadcast_state(
+                "mix-state", state.mix.to_dict(), exclude=None, allow_drop=True
+            )
+
+        await broadcast()
+        await broadcast()
+        state.apply_crossfader_update({"target": "ab", "value": 0.1})
+        await broadcast()
+        return [message.payload["payload"]["crossfaderAB"] for message in session._send_buffer]
+
+    assert asyncio.run(scenario()) == [0.5, 0.1]
+
+
+def test_shed_state_frame_is_resent_when_repeated() -> None:
+    async def scenario() -> list:
+        state = EngineState()
+        manager = RealtimeManager(state, dict, lambda: None, deck_manager=DeckManager())
+        session = RealtimeSession(manager, websocket=None, queue_size=1)  # type: ignore[arg-type]
+        manager._register(session)
+
+        async def broadcast() -> None:
+            await manager._broadcast_state(
+                "mix-state", state.mix.to_dict(), exclude=None, allow_drop=True
+            )
+
+        session.send_nowait({"type": "transport"})
+        await broadcast()
+        session._send_buffer.clear()
+        await broadcast()
+        return [message.payload["type"] for message in session._send_buffer]
+
+    assert asyncio.run(scenario()) == ["mix-state"]
+
+
+def test_bursty_mix_state_broadcasts_are_coalesced() -> None:
+    async def scenario() -> list:
+        state = EngineState()
+        manager = RealtimeManager(
+            state, dict, lambda: None, deck_manager=DeckManager(), state_broadcast_interval=0.01
+        )
+        sender = RealtimeSession(manager, websocket=None, queue_size=8)  # type: ignore[arg-type]
+        viewer = RealtimeSession(manager, websocket=None, queue_size=8)  # type: ignore[arg-type]
+        manager._register(sender)
+        manager._register(viewer)
+
+        for value in (0.1, 0.2, 0.3):
+            state.apply_crossfader_update({"target": "ab", "value": value})
+            await manager.broadcast_mix_state(exclude=sender)
+        await asyncio.sleep(0.05)
+
+        assert not sender._send_buffer
+        return [message.payload["payload"]["crossfaderAB"] for message in viewer._send_buffer]
+
+    assert asyncio.run(scenario()) == [0.3]
+
+
+def test_batch_clients_receive_backlog_as_one_array_frame() -> None:
+    async def scenario(supports_batch: bool) -> list:
+        manager = RealtimeManager(EngineState(), dict, lambda: None, deck_manager=DeckManager())
+        websocket = _RecordingWebSocket()
+        session = RealtimeSession(manager, websocket, queue_size=8)  # type: ignore[arg-type]
+        session.supports_batch = supports_batch
+        for index in range(3):
+            await session.send({"type": "code-progress", "index": index})
+
+        sender = asyncio.create_task(session._send_loop())
+        await asyncio.sleep(0)
+        session._mark_stopped()
+        await asyncio.wait_for(sender, timeout=1.0)
+        return [json.loads(frame) for frame in websocket.frames]
+
+    batched = asyncio.run(scenario(True))
+    assert len(batched) == 1
+    assert [message["index"] for message in batched[0]] == [0, 1, 2]
+
+    assert len(asyncio.run(scenario(False))) == 3
+
+
+def test_transport_command_parses_expected_rev() -> None:
+    with TestClient(create_app(state=EngineState())) as client:
+        with client.websocket_connect("/realtime") as websocket:
+            websocket.send_json({"type": "hello", "role": "controller"})
+            _receive_until(websocket, "init")
+
+            websocket.send_json(
+                {"type": "transport-command", "payload": {"op": "play", "expectedRev": "x"}}
+            )
+            error = _receive_until(websocket, "transport-error")
+
+            websocket.send_json(
+                {"type": "transport-command", "payload": {"op": "play", "rev": "0"}}
+            )
+            applied = _receive_until(websocket, "transport")
+
+    assert error["payload"]["message"] == "payload.expected_rev must be an integer"
+    assert applied["payload"]["playing"] is True
+
+
+def test_load_deck_commits_source_and_reports_ready() -> None:
+    state = EngineState()
+    with TestClient(create_app(state=state)) as client:
+        with client.websocket_connect("/realtime") as websocket:
+            websocket.send_json({"type": "hello", "deckId": "a", "role": "controller"})
+            _receive_until(websocket, "init")
+
+            websocket.send_json(
+                {"type": "loadDeck", "deckId": "a", "commandId": "load-1", "payload": {"src": "https://cdn.example/a.mp4"}}
+            )
+            deck_states = []
+            while (message := websocket.receive_json())["type"] != "deckReady":
+                if message["type"] == "deck-media-state":
+                    deck_states.append(message["payload"]["state"])
+            ready = message
+
+    assert [deck["isLoading"] for deck in deck_states] == [True, False]
+    assert deck_states[1]["src"] == "https://cdn.example/a.mp4"
+    assert deck_states[1]["version"] == deck_states[0]["version"] + 1
+    assert ready["commandId"] == "load-1"
+    assert ready["payload"]["src"] == "https://cdn.example/a.mp4"
+    assert state.pipeline.describe()["decks"]["a"]["currentUri"] == "https://cdn.example/a.mp4"
+
+
+def test_transport_errors_echo_command_id() -> None:
+    async def scenario() -> list:
+        manager = RealtimeManager(EngineState(), dict, lambda: None, deck_manager=DeckManager())
+        websocket = _RecordingWebSocket()
+        session = RealtimeSession(manager, websocket, queue_size=8)  # type: ignore[arg-type]
+        session.client_role = "controller"
+        await manager.handle_message(
+            session, {"type": "transport-command", "commandId": 'cmd "1"', "payload": {}}
+        )
+        await manager.handle_message(
+            session, {"type": "transport-command", "payload": {"op": "play", "rev": -1}}
+        )
+
+        sender = asyncio.create_task(session._send_loop())
+        await asyncio.sleep(0)
+        session._mark_stopped()
+        await asyncio.wait_for(sender, timeout=1.0)
+        return [json.loads(frame) for frame in websocket.frames]
+
+    missing_op, negative_rev = asyncio.run(scenario())
+
+    assert missing_op == {
+        "type": "transport-error",
+        "commandId": 'cmd "1"',
+        "payload": {"code": "E_INVALID_PAYLOAD", "message": "transport-command requires payload.op"},
+    }
+    assert negative_rev["payload"]["message"] == "payload.expected_rev must be non-negative"
+    assert negative_rev["commandId"]
+
+
+def test_hello_feature_negotiation() -> None:
+    async def scenario(hello: dict, legacy: bool = False) -> tuple:
+        manager = RealtimeManager(EngineState(), dict, lambda: None, deck_manager=DeckManager())
+        session = RealtimeSession(manager, websocket=None, queue_size=8)  # type: ignore[arg-type]
+        await manager.initialise_session(session, hello, legacy=legacy)
+        return session.supports_ack, session.supports_batch
+
+    assert asyncio.run(scenario({"features": ["ACK", "batch"]})) == (True, True)
+    assert asyncio.run(scenario({"features": {"acks": 1}})) == (True, False)
+    assert asyncio.run(scenario({"requireAck": True})) == (True, False)
+    assert asyncio.run(scenario({"features": ["ack", "batch"]}, legacy=True)) == (False, False)
+    assert asyncio.run(scenario({})) == (False, False)
+
+
+def test_session_failure_unregisters_and_closes() -> None:
+    class _ScriptedWebSocket(_RecordingWebSocket):
+        def __init__(self) -> None:
+            super().__init__()
+            self.frames_in = [{"type": "websocket.receive", "text": '{"type": "hello", "deckId": "a"}'}]
+
+        async def accept(self) -> None:
+            pass
+
+        async def receive(self) -> dict:
+            if self.frames_in:
+                return self.frames_in.pop(0)
+            raise RuntimeError("transport broke")
+
+    async def scenario() -> tuple:
+        manager = RealtimeManager(EngineState(), dict, lambda: None, deck_manager=DeckManager())
+        websocket = _ScriptedWebSocket()
+        session = RealtimeSession(manager, websocket, queue_size=8)  # type: ignore[arg-type]
+        await asyncio.wait_for(session.run(), timeout=1.0)
+        return manager._session_view, websocket.close_code, [task.done() for task in session._tasks]
+
+    view, close_code, tasks_done = asyncio.run(scenario())
+
+    assert view == ()
+    assert close_code == 1000
+    assert tasks_done and all(tasks_done)
+
+
+def test_session_retrieves_every_failed_task(caplog: pytest.LogCaptureFixture) -> None:
+    class _HelloWebSocket(_RecordingWebSocket):
+        async def accept(self) -> None:
+            pass
+
+        async def receive(self) -> dict:
+            return {"type": "websocket.receive", "text": '{"type": "hello"}'}
+
+    async def scenario() -> list:
+        unretrieved: list = []
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: unretrieved.append(context))
+        manager = RealtimeManager(EngineState(), dict, lambda: None, deck_manager=DeckManager())
+        session = RealtimeSession(manager, _HelloWebSocket(), queue_size=8)  # type: ignore[arg-type]
+
+        async def broken_loop() -> None:
+            raise RuntimeError("loop broke")
+
+        session._recv_loop = broken_loop  # type: ignore[method-assign]
+        session._keepalive_loop = broken_loop  # type: ignore[method-assign]
+        await asyncio.wait_for(session.run(), timeout=1.0)
+        del session
+        gc.collect()
+        return unretrieved
+
+    with caplog.at_level("ERROR"):
+        assert asyncio.run(scenario()) == []
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert "Realtime session crashed" in messages
+    assert any(message.endswith("-keepalive task failed") for message in messages)
+
+
+def test_stop_shuts_down_pipeline_executor() -> None:
+    async def scenario() -> None:
+        manager = RealtimeManager(EngineState(), dict, lambda: None, deck_manager=DeckManager())
+        await manager.start()
+        executor = manager._pipeline_executor
+        await manager.stop()
+
+        with pytest.raises(RuntimeError):
+            executor.submit(int)
+
+        await manager.start()
+        loop = asyncio.get_running_loop()
+        assert await loop.run_in_executor(manager._pipeline_executor, int, "7") == 7
+        await manager.stop()
+
+    asyncio.run(scenario())
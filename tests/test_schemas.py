@@ -0,0 +1,61 @@
+"""Tests covering request/response schema validation."""
+
+from __future__ import annotations
+
+import pytest
+from pydantic import ValidationError
+
+from engine.api import schemas
+
+
+def test_deck_model_clamps_opacity() -> None:
+    assert schemas.DeckModel(opacity=1.7).opacity == 1.0
+    assert schemas.DeckModel(opacity=-0.2).opacity == 0.0
+    assert schemas.DeckModel(opacity="0.25").opacity == 0.25
+
+
+def test_mix_state_model_clamps_crossfaders() -> None:
+    model = schemas.MixStateModel(crossfaderAB=2.0, crossfaderCD=-1.0)
+
+    assert model.crossfaderAB == 1.0
+    assert model.crossfaderAC == 0.5
+    assert model.crossfaderCD == 0.0
+
+
+def test_viewer_status_model_clamps_sensitivity() -> None:
+    assert schemas.ViewerStatusModel(audioSensitivity=-3).audioSensitivity == 0.0
+    assert schemas.ViewerStatusModel(audioSensitivity=2.5).audioSensitivity == 2.5
+
+
+def test_transport_command_request_resolves_aliases() -> None:
+    request = schemas.TransportCommandRequest.model_validate(
+        {"op": " Seek ", "expectedRev": 3, "posUs": 1500}
+    )
+
+    assert request.op == "seek"
+    assert request.rev == 3
+    assert request.position_us == 1500
+    assert request.rate is None
+
+
+def test_transport_command_request_rejects_negative_rev() -> None:
+    with pytest.raises(ValidationError):
+        schemas.TransportCommandRequest.model_validate({"op": "play", "rev": -1})
+
+
+def test_transport_command_request_requires_op() -> None:
+    with pytest.raises(ValidationError):
+        schemas.TransportCommandRequest.model_validate({"op": "  ", "rev": 0})
+
+
+def test_transport_command_request_rejects_unknown_op() -> None:
+    with pytest.raises(ValidationError):
+        schemas.TransportCommandRequest.model_validate({"op": "rewind", "rev": 0})
+
+
+def test_transport_command_request_is_hashable_and_frozen() -> None:
+    request = schemas.TransportCommandRequest.model_validate({"op": "play", "rev": 0})
+
+    assert hash(request) == hash(schemas.TransportCommandRequest(op="play", expected_rev=0))
+    with pytest.raises(ValidationError):
+        request.op = "pause"  # type: ignore[misc]
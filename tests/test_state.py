@@ -0,0 +1,23 @@
+"""Tests covering the shared engine state container."""
+
+from __future__ import annotations
+
+import math
+
+from engine.api.state import EngineState, clamp01
+
+
+def test_clamp01_bounds_and_coerces() -> None:
+    assert clamp01(-0.5) == 0.0
+    assert clamp01(0.25) == 0.25
+    assert clamp01(3) == 1.0
+    assert clamp01("0.75") == 0.75  # type: ignore[arg-type]
+    assert clamp01(math.nan) == 1.0
+
+
+def test_apply_crossfader_update_clamps_value() -> None:
+    state = EngineState()
+
+    assert state.apply_crossfader_update({"target": "main", "value": 4})
+    assert state.mix.crossfader_ab == 1.0
+    assert not state.apply_crossfader_update({"target": "zz", "value": 0.2})